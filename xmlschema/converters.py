@@ -11,13 +11,14 @@
 This module contains converter classes and definitions.
 """
 from __future__ import unicode_literals
+from array import array
 from collections import namedtuple
 from types import MethodType
 import string
 import warnings
 
-from .compat import ordered_dict_class, unicode_type
-from .exceptions import XMLSchemaValueError
+from .compat import ordered_dict_class, unicode_type, string_base_type, long_type, Mapping
+from .exceptions import XMLSchemaTypeError, XMLSchemaValueError
 from .etree import etree_element, lxml_etree_element, etree_register_namespace, lxml_etree_register_namespace
 from .namespaces import XSI_NAMESPACE
 from .helpers import local_name
@@ -35,6 +36,16 @@ attributes.
 """
 
 
+def has_text(value):
+    """
+    Returns `True` if the decoded text value is not `None` or an empty string.
+    Safe also for values that don't compare to a string as a scalar (eg. arrays).
+    """
+    if isinstance(value, string_base_type):
+        return value != ''
+    return value is not None
+
+
 def raw_xml_encode(value):
     if isinstance(value, bool):
         return 'true' if value else 'false'
@@ -270,11 +281,11 @@ class XMLSchemaConverter(NamespaceMapper):
         if xsd_element.type.is_simple() or xsd_element.type.has_simple_content():
             if data.attributes or self.force_dict and not xsd_element.type.is_simple():
                 result_dict.update(t for t in self.map_attributes(data.attributes))
-                if data.text is not None and data.text != '':
+                if has_text(data.text):
                     result_dict[self.text_key] = data.text
                 return result_dict
             else:
-                return data.text if data.text != '' else None
+                return data.text if has_text(data.text) else None
         else:
             if data.attributes:
                 result_dict.update(t for t in self.map_attributes(data.attributes))
@@ -513,7 +524,7 @@ class ParkerConverter(XMLSchemaConverter):
             if preserve_root:
                 return self.dict([(map_qname(data.tag), data.text)])
             else:
-                return data.text if data.text != '' else None
+                return data.text if has_text(data.text) else None
         else:
             result_dict = self.dict()
             list_types = list if self.list is list else (self.list, list)
@@ -630,7 +641,7 @@ class BadgerFishConverter(XMLSchemaConverter):
             result_dict['@xmlns'] = dict_class()
 
         if xsd_element.type.is_simple() or xsd_element.type.has_simple_content():
-            if data.text is not None and data.text != '':
+            if has_text(data.text):
                 result_dict[self.text_key] = data.text
         else:
             has_single_group = xsd_element.type.content_type.is_single()
@@ -771,7 +782,7 @@ class AbderaConverter(XMLSchemaConverter):
 
     def element_decode(self, data, xsd_element, level=0):
         if xsd_element.type.is_simple() or xsd_element.type.has_simple_content():
-            children = data.text if data.text is not None and data.text != '' else None
+            children = data.text if has_text(data.text) else None
         else:
             children = self.dict()
             for name, value, xsd_child in self.map_content(data.content):
@@ -890,7 +901,7 @@ class JsonMLConverter(XMLSchemaConverter):
         attributes = self.dict([(k, v) for k, v in self.map_attributes(data.attributes)])
 
         if xsd_element.type.is_simple() or xsd_element.type.has_simple_content():
-            if data.text is not None and data.text != '':
+            if has_text(data.text):
                 result_list.append(data.text)
         else:
             result_list.extend([
@@ -945,3 +956,162 @@ class JsonMLConverter(XMLSchemaConverter):
                 for e in obj[content_index:]
             ]
             return ElementData(xsd_element.name, None, content, attributes)
+
+
+class ColumnarConverter(XMLSchemaConverter):
+    """
+    XML Schema based converter class for decoding record-oriented data to columns.
+    Each element is decoded to a flat list of couples (field, value), where the
+    field is the path of a leaf value relative to the element, with the names of
+    the attributes prefixed by '@'. The text of a simple content element has an
+    empty path. The records can be accumulated into columns using a
+    :class:`ColumnarData` instance. This converter doesn't support encoding.
+
+    :param namespaces: Map from namespace prefixes to URI.
+    :param dict_class: Dictionary class to use for decoded data. Default is `dict`.
+    :param list_class: List class to use for decoded data. Default is `list`.
+    """
+    def __init__(self, namespaces=None, dict_class=None, list_class=None, **kwargs):
+        kwargs.update(attr_prefix='@', text_key='', cdata_prefix=None)
+        super(ColumnarConverter, self).__init__(namespaces, dict_class, list_class, **kwargs)
+
+    def __setattr__(self, name, value):
+        if name == 'text_key' and value != '' or name == 'attr_prefix' and value != '@' or \
+                name == 'cdata_prefix' and value is not None:
+            raise XMLSchemaValueError('Wrong value %r for the attribute %r of a %r.' % (value, name, type(self)))
+        super(ColumnarConverter, self).__setattr__(name, value)
+
+    @property
+    def lossy(self):
+        return True
+
+    def element_decode(self, data, xsd_element, level=0):
+        fields = self.list(self.map_attributes(data.attributes))
+        if xsd_element.type.is_simple() or xsd_element.type.has_simple_content():
+            fields.append(('', data.text))
+        else:
+            for name, value, _ in self.map_content(data.content):
+                fields.extend(('%s/%s' % (name, field) if field else name, v) for field, v in value)
+        return fields
+
+    def element_encode(self, obj, xsd_element, level=0):
+        raise XMLSchemaTypeError("the columnar converter is decode-only, %r cannot be used "
+                                 "for encoding." % type(self))
+
+
+try:
+    array('q')
+except ValueError:
+    INT_TYPECODE = 'l'  # Python 2
+else:
+    INT_TYPECODE = 'q'
+
+
+class ColumnarData(Mapping):
+    """
+    A mapping from field names to columns, built appending the records decoded
+    by a :class:`ColumnarConverter`. Integer and float fields are stored in typed
+    arrays of the module :mod:`array` (usable as buffers by NumPy and pandas),
+    other fields in lists. A field that is repeated in the same record is stored
+    in a list column, with a list of values for that record.
+
+    :param text_key: the name of the column for the text of the records that \
+    have a simple content.
+
+    :ivar masks: a dictionary from field names to null masks, that are arrays \
+    of bytes where 1 marks a missing value. Missing values are stored as `0` \
+    in integer columns, as `nan` in float columns and as `None` in lists.
+    """
+    def __init__(self, text_key='$'):
+        self.text_key = text_key
+        self._columns = ordered_dict_class()
+        self.masks = ordered_dict_class()
+        self.size = 0
+
+    def __getitem__(self, field):
+        return self._columns[field]
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def __repr__(self):
+        return '%s(fields=%r, size=%d)' % (self.__class__.__name__, list(self._columns), self.size)
+
+    def append(self, record):
+        """
+        Appends a record to the columns.
+
+        :param record: a list of couples (field, value), as returned by :class:`ColumnarConverter`.
+        """
+        index = self.size
+        repeated = set()
+        for field, value in record:
+            if not field:
+                field = self.text_key
+
+            try:
+                column = self._columns[field]
+            except KeyError:
+                column = self._new_column(field, value, index)
+                mask = self.masks[field]
+            else:
+                mask = self.masks[field]
+                if len(column) > index:
+                    if not isinstance(column, list):
+                        column = self._to_list(field)
+                    if field in repeated:
+                        column[index].append(value)
+                    else:
+                        column[index] = [column[index], value]
+                        repeated.add(field)
+                    mask[index] = 0
+                    continue
+
+            if value is None:
+                column.append(None if isinstance(column, list) else self._null(column))
+                mask.append(1)
+                continue
+            elif not isinstance(column, list):
+                try:
+                    if isinstance(value, bool):
+                        raise TypeError()
+                    column.append(value)
+                except (TypeError, OverflowError):
+                    column = self._to_list(field)
+                    column.append(value)
+            else:
+                column.append(value)
+            mask.append(0)
+
+        self.size = index + 1
+        for field, column in self._columns.items():
+            if len(column) == index:
+                column.append(None if isinstance(column, list) else self._null(column))
+                self.masks[field].append(1)
+
+    def _new_column(self, field, value, size):
+        if isinstance(value, bool):
+            column = [None] * size
+        elif isinstance(value, (int, long_type)):
+            column = array(INT_TYPECODE, [0]) * size
+        elif isinstance(value, float):
+            column = array('d', [float('nan')]) * size
+        else:
+            column = [None] * size
+        self._columns[field] = column
+        self.masks[field] = array('b', [1]) * size
+        return column
+
+    @staticmethod
+    def _null(column):
+        return float('nan') if column.typecode == 'd' else 0
+
+    def _to_list(self, field):
+        mask = self.masks[field]
+        column = self._columns[field] = [
+            None if mask[k] else v for k, v in enumerate(self._columns[field])
+        ]
+        return column
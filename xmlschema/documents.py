@@ -11,8 +11,11 @@
 from __future__ import unicode_literals
 import json
 
-from .compat import ordered_dict_class
+from .compat import ordered_dict_class, StringIO
+from .exceptions import XMLSchemaValueError
+from .converters import ColumnarConverter, ColumnarData
 from .resources import fetch_schema_locations, XMLResource
+from .validators import XMLSchemaValidationError
 from .validators.schema import XMLSchema, XMLSchemaBase
 
 
@@ -106,13 +109,23 @@ def to_dict(xml_document, schema=None, cls=None, path=None, process_namespaces=T
     return schema.to_dict(source, path=path, process_namespaces=process_namespaces, **kwargs)
 
 
+def _array_to_list(obj):
+    """JSON serializer fallback for NumPy arrays decoded with *list_array=True*."""
+    try:
+        return obj.tolist()
+    except AttributeError:
+        raise TypeError("Object of type %r is not JSON serializable" % type(obj).__name__)
+
+
 def to_json(xml_document, fp=None, schema=None, cls=None, path=None, converter=None,
             process_namespaces=True, locations=None, base_url=None, defuse='remote',
-            timeout=300, lazy=False, json_options=None, **kwargs):
+            timeout=300, lazy=False, json_options=None, lines=False, **kwargs):
     """
     Serialize an XML document to JSON. For default the XML data is validated during
     the decoding phase. Raises an :exc:`XMLSchemaValidationError` if the XML document
-    is not validated against the schema.
+    is not validated against the schema. The JSON data is written incrementally, one
+    decoded element at a time, so with a *path* that matches many elements and a lazy
+    resource the memory usage doesn't depend on the size of the XML document.
 
     :param xml_document: can be an :class:`XMLResource` instance, a file-like object a path \
     to a file or an URI of a resource or an Element instance or an ElementTree instance or \
@@ -133,8 +146,12 @@ def to_json(xml_document, fp=None, schema=None, cls=None, path=None, converter=N
     :param timeout: optional argument to pass for construct schema and :class:`XMLResource` instances.
     :param lazy: optional argument for construct the :class:`XMLResource` instance.
     :param json_options: a dictionary with options for the JSON serializer.
+    :param lines: if set to `True` writes JSON Lines, with a line for each element \
+    matched by *path*, instead of a JSON array. Incompatible with the *indent* \
+    option of the JSON serializer.
     :param kwargs: optional arguments of :meth:`XMLSchema.iter_decode` as keyword arguments \
-    to variate the decoding process.
+    to variate the decoding process. The NumPy arrays decoded with *list_array=True* are \
+    written as JSON arrays.
     :return: a string containing the JSON data if *fp* is `None`, otherwise doesn't return anything. \
     If ``validation='lax'`` keyword argument is provided the validation errors are collected and \
     returned, eventually coupled in a tuple with the JSON data.
@@ -144,21 +161,111 @@ def to_json(xml_document, fp=None, schema=None, cls=None, path=None, converter=N
     source, schema = get_context(xml_document, schema, cls, locations, base_url, defuse, timeout, lazy)
     if json_options is None:
         json_options = {}
+    elif lines and json_options.get('indent') is not None:
+        raise XMLSchemaValueError("JSON Lines output is incompatible with the 'indent' option")
+
+    if kwargs.get('list_array') and 'default' not in json_options and 'cls' not in json_options:
+        json_options = dict(json_options, default=_array_to_list)
+
+    validation = kwargs.pop('validation', 'strict')
     decimal_type = kwargs.pop('decimal_type', float)
     dict_class = kwargs.pop('dict_class', ordered_dict_class)
-    obj = schema.to_dict(source, path=path, decimal_type=decimal_type, dict_class=dict_class,
-                         process_namespaces=process_namespaces, converter=converter, **kwargs)
+    results = schema.iter_decode(source, path=path, validation=validation, decimal_type=decimal_type,
+                                 dict_class=dict_class, process_namespaces=process_namespaces,
+                                 converter=converter, **kwargs)
+
+    if 'separators' in json_options:
+        item_separator = json_options['separators'][0]
+    else:
+        item_separator = ', ' if json_options.get('indent') is None else ','
+
+    output = StringIO() if fp is None else fp
+    errors = []
+    first, count = None, 0
+    for result in results:
+        if isinstance(result, XMLSchemaValidationError):
+            if validation != 'lax':
+                raise result
+            errors.append(result)
+            continue
 
-    if isinstance(obj, tuple):
-        if fp is not None:
-            json.dump(obj[0], fp, **kwargs)
-            return tuple(obj[1])
+        # Only the first decoded element is kept, for writing it without
+        # the array's brackets if it's the only one.
+        if lines:
+            json.dump(result, output, **json_options)
+            output.write('\n')
+        elif not count:
+            first = result
         else:
-            return json.dumps(obj[0], **json_options), tuple(obj[1])
-    elif fp is not None:
-        json.dump(obj, fp, **json_options)
+            if count == 1:
+                output.write('[')
+                json.dump(first, output, **json_options)
+                first = None
+            output.write(item_separator)
+            json.dump(result, output, **json_options)
+        count += 1
+
+    if not lines:
+        if count > 1:
+            output.write(']')
+        else:
+            json.dump(first, output, **json_options)
+
+    if fp is not None:
+        return tuple(errors) if validation == 'lax' else None
+    elif validation == 'lax':
+        return output.getvalue(), tuple(errors)
     else:
-        return json.dumps(obj, **json_options)
+        return output.getvalue()
+
+
+def to_columns(xml_document, path, schema=None, cls=None, converter=None, text_key='$',
+               locations=None, base_url=None, defuse='remote', timeout=300, lazy=False, **kwargs):
+    """
+    Decodes the records of an XML document to columns, one for each leaf field of
+    the records, without building a data structure for each record. For default
+    the XML data is validated during the decoding phase. Raises an
+    :exc:`XMLSchemaValidationError` if the XML document is not validated against
+    the schema.
+
+    :param xml_document: can be an :class:`XMLResource` instance, a file-like object a path \
+    to a file or an URI of a resource or an Element instance or an ElementTree instance or \
+    a string containing the XML data. If the passed argument is not an :class:`XMLResource` \
+    instance a new one is built using this and *defuse*, *timeout* and *lazy* arguments.
+    :param path: an XPath expression that matches the record elements of the XML data.
+    :param schema: can be a schema instance or a file-like object or a file path or a URL \
+    of a resource or a string containing the schema.
+    :param cls: class to use for building the schema instance (for default uses :class:`XMLSchema`).
+    :param converter: a :class:`ColumnarConverter` subclass or instance to use for the decoding.
+    :param text_key: the name of the column for the text of records with a simple content.
+    :param locations: additional schema location hints, in case a schema instance has to be built.
+    :param base_url: is an optional custom base URL for remapping relative locations, for \
+    default uses the directory where the XSD or alternatively the XML document is located.
+    :param defuse: optional argument to pass for construct schema and :class:`XMLResource` instances.
+    :param timeout: optional argument to pass for construct schema and :class:`XMLResource` instances.
+    :param lazy: optional argument for construct the :class:`XMLResource` instance.
+    :param kwargs: other optional arguments of :meth:`XMLSchema.iter_decode` as keyword arguments.
+    :return: a :class:`ColumnarData` instance. If ``validation='lax'`` keyword argument is \
+    provided the validation errors are collected and returned coupled in a tuple with the \
+    columnar data.
+    :raises: :exc:`XMLSchemaValidationError` if the object is not decodable by \
+    the XSD component, or also if it's invalid when ``validation='strict'`` is provided.
+    """
+    source, schema = get_context(xml_document, schema, cls, locations, base_url, defuse, timeout, lazy)
+    validation = kwargs.pop('validation', 'strict')
+    decimal_type = kwargs.pop('decimal_type', float)
+
+    data, errors = ColumnarData(text_key), []
+    for result in schema.iter_decode(source, path=path, validation=validation, decimal_type=decimal_type,
+                                     converter=converter or ColumnarConverter, **kwargs):
+        if not isinstance(result, XMLSchemaValidationError):
+            data.append(result)
+        elif validation == 'lax':
+            errors.append(result)
+        else:
+            raise result
+
+    return (data, errors) if validation == 'lax' else data
 
 
 def from_json(source, schema, path=None, converter=None, json_options=None, **kwargs):
@@ -194,3 +301,42 @@ def from_json(source, schema, path=None, converter=None, json_options=None, **kw
         obj = json.loads(source, object_hook=object_hook, object_pairs_hook=object_pairs_hook, **json_options)
 
     return schema.encode(obj, path=path, converter=converter, dict_class=dict_class, **kwargs)
+
+
+def write_xml(obj, fp, schema, path=None, converter=None, content=None, **kwargs):
+    """
+    Encodes data to XML and writes it incrementally to a file-like object. The child
+    elements of the root are encoded, validated and written one at a time, so if
+    the data of the children is provided by a generator the encoded XML tree is
+    never kept in memory.
+
+    :param obj: the data of the root element.
+    :param fp: a :meth:`write()` supporting file-like object, that accepts strings.
+    :param schema: an :class:`XMLSchema` instance.
+    :param path: is an optional XPath expression for selecting the element of the schema \
+    that matches the data that has to be encoded. For default the first global element of \
+    the schema is used.
+    :param converter: an :class:`XMLSchemaConverter` subclass or instance to use for the encoding.
+    :param content: an optional iterable of couples (name, value) with the data of further \
+    children of the root element, written after the children included in *obj*.
+    :param kwargs: Keyword arguments containing options for converter and encoding.
+    :return: `None`. If ``validation='lax'`` keyword argument is provided the validation \
+    errors are collected and returned.
+    :raises: :exc:`XMLSchemaValidationError` if the object is not encodable by the schema, \
+    or also if it's invalid when ``validation='strict'`` is provided.
+    """
+    if not isinstance(schema, XMLSchemaBase):
+        raise TypeError("An XMLSchema instance required for 'schema' argument: %r" % schema)
+
+    validation = kwargs.pop('validation', 'strict')
+    errors = []
+    for result in schema.iter_serialize(obj, path, validation, converter=converter, content=content, **kwargs):
+        if not isinstance(result, XMLSchemaValidationError):
+            fp.write(result)
+        elif validation == 'lax':
+            errors.append(result)
+        else:
+            raise result
+
+    if validation == 'lax':
+        return tuple(errors)
@@ -16,6 +16,7 @@ import sys
 import re
 import importlib
 from collections import Counter
+from xml.sax.saxutils import unescape
 
 try:
     import lxml.etree as lxml_etree
@@ -202,6 +203,67 @@ def etree_tostring(elem, namespaces=None, indent='', max_lines=None, spaces_for_
     return '\n'.join(reindent(line) for line in lines)
 
 
+XMLNS_DECLARATION_PATTERN = re.compile(r'\sxmlns(?::([^\s=]+))?="([^"]*)"')
+
+
+def etree_namespace_declarations(text):
+    """
+    Returns the namespace declarations of the first start tag of a serialized
+    XML text, as a dictionary that maps prefixes to URIs. The default namespace
+    is mapped by the empty prefix.
+
+    :param text: a string starting with an XML start tag.
+    """
+    start_tag = text[:text.index('>')]
+    return {
+        m.group(1) or '': unescape(m.group(2), {'&quot;': '"'})
+        for m in XMLNS_DECLARATION_PATTERN.finditer(start_tag)
+    }
+
+
+def etree_serialize(elem, namespaces=None):
+    """
+    Serialize an Element tree to a Unicode string, preserving the text and the tails
+    of the subelements as they are. The tail of the element is not serialized.
+
+    :param elem: the Element instance.
+    :param namespaces: an optional mapping from prefixes to URIs with the namespace \
+    declarations in scope, e.g. the ones of an ancestor that is serialized apart. \
+    The declarations of the element that are equal to these ones are not repeated.
+    :return: a Unicode string.
+    """
+    if isinstance(elem, etree_element):
+        tostring = ElementTree.tostring
+    elif isinstance(elem, py_etree_element):
+        tostring = PyElementTree.tostring
+    elif lxml_etree is not None:
+        tostring = lxml_etree.tostring
+    else:
+        raise XMLSchemaTypeError("cannot serialize %r: lxml library not available." % type(elem))
+
+    tail, elem.tail = elem.tail, None
+    try:
+        if PY3 or not isinstance(elem, (etree_element, py_etree_element)):
+            text = tostring(elem, encoding="unicode")
+        else:
+            text = unicode(tostring(elem))
+    finally:
+        elem.tail = tail
+
+    if not namespaces:
+        return text
+
+    def remove_declaration(match):
+        if namespaces.get(match.group(1) or '') == unescape(match.group(2), {'&quot;': '"'}):
+            return ''
+        return match.group(0)
+
+    # Only the element's start tag is processed, the declarations of the
+    # descendants are written by the serializer where they are needed.
+    index = text.index('>')
+    return XMLNS_DECLARATION_PATTERN.sub(remove_declaration, text[:index]) + text[index:]
+
+
 def etree_iterpath(elem, tag=None, path='.', namespaces=None, add_position=False):
     """
     Creates an iterator for the element and its subelements that yield elements and paths.
@@ -218,6 +280,20 @@ def etree_iterpath(elem, tag=None, path='.', namespaces=None, add_position=False
     if tag is None or elem.tag == tag:
         yield elem, path
 
+    # Depth-first traversal with an explicit stack, for not exceeding the
+    # recursion limit on deeply nested trees.
+    stack = [_iter_child_paths(elem, path, namespaces, add_position)]
+    while stack:
+        for child, child_path in stack[-1]:
+            if tag is None or child.tag == tag:
+                yield child, child_path
+            stack.append(_iter_child_paths(child, child_path, namespaces))
+            break
+        else:
+            stack.pop()
+
+
+def _iter_child_paths(elem, path, namespaces=None, add_position=False):
     if add_position:
         children_tags = Counter([e.tag for e in elem])
         positions = Counter([t for t in children_tags if children_tags[t] > 1])
@@ -240,8 +316,7 @@ def etree_iterpath(elem, tag=None, path='.', namespaces=None, add_position=False
             child_path += '[%d]' % positions[child.tag]
             positions[child.tag] += 1
 
-        for _child, _child_path in etree_iterpath(child, tag, child_path, namespaces):
-            yield _child, _child_path
+        yield child, child_path
 
 
 def etree_getpath(elem, root, namespaces=None, relative=True, add_position=False):
@@ -13,6 +13,7 @@ This module contains various helper functions and classes.
 """
 import re
 
+from .compat import string_base_type
 from .exceptions import XMLSchemaValueError, XMLSchemaTypeError
 from .qnames import XSD_ANNOTATION
 
@@ -147,6 +148,14 @@ def get_xsd_form_attribute(elem, attribute):
     return value
 
 
+def is_cacheable_value(value):
+    """
+    Returns `True` if a decoded value can be shared between decoding results,
+    that is if it's a string or an atomic value, `False` for lists and arrays.
+    """
+    return isinstance(value, string_base_type) or not hasattr(value, '__len__')
+
+
 class ParticleCounter(object):
     """
     An helper class for counting total min/max occurrences of XSD particles.
@@ -82,12 +82,15 @@ class NamespaceResourcesMap(MutableMapping):
 
 class NamespaceMapper(MutableMapping):
     """
-    A class to map/unmap namespace prefixes to URIs.
+    A class to map/unmap namespace prefixes to URIs. The mapped and unmapped
+    QNames are cached, the caches are cleared when the namespace map changes.
 
     :param namespaces: Initial data with namespace prefixes and URIs.
     """
     def __init__(self, namespaces=None, register_namespace=None):
         self._namespaces = {}
+        self._mapped_qnames = {}
+        self._unmapped_qnames = {}
         self.register_namespace = register_namespace
         if namespaces is not None:
             self.update(namespaces)
@@ -96,6 +99,9 @@ class NamespaceMapper(MutableMapping):
         return self._namespaces[key]
 
     def __setitem__(self, key, value):
+        if self._namespaces.get(key) != value:
+            self._mapped_qnames.clear()
+            self._unmapped_qnames.clear()
         self._namespaces[key] = value
         try:
             self.register_namespace(key, value)
@@ -104,6 +110,8 @@ class NamespaceMapper(MutableMapping):
 
     def __delitem__(self, key):
         del self._namespaces[key]
+        self._mapped_qnames.clear()
+        self._unmapped_qnames.clear()
 
     def __iter__(self):
         return iter(self._namespaces)
@@ -117,6 +125,8 @@ class NamespaceMapper(MutableMapping):
 
     def clear(self):
         self._namespaces.clear()
+        self._mapped_qnames.clear()
+        self._unmapped_qnames.clear()
 
     def map_qname(self, qname):
         """
@@ -132,19 +142,24 @@ class NamespaceMapper(MutableMapping):
         except IndexError:
             return qname
 
+        try:
+            return self._mapped_qnames[qname]
+        except KeyError:
+            pass
+
         qname_uri = get_namespace(qname)
-        for prefix, uri in self.items():
-            if uri != qname_uri:
-                continue
-            if prefix:
-                self._namespaces[prefix] = uri
-                return qname.replace(u'{%s}' % uri, u'%s:' % prefix)
-            else:
-                if uri:
-                    self._namespaces[prefix] = uri
-                return qname.replace(u'{%s}' % uri, '')
+        for prefix, uri in self._namespaces.items():
+            if uri == qname_uri:
+                if prefix:
+                    result = qname.replace(u'{%s}' % uri, u'%s:' % prefix)
+                else:
+                    result = qname.replace(u'{%s}' % uri, '')
+                break
         else:
-            return qname
+            result = qname
+
+        self._mapped_qnames[qname] = result
+        return result
 
     def unmap_qname(self, qname, name_table=None):
         """
@@ -158,27 +173,34 @@ class NamespaceMapper(MutableMapping):
         :return: a QName in extended format or a local name.
         """
         try:
-            if qname[0] == '{' or not self:
+            if qname[0] == '{' or not self._namespaces:
                 return qname
         except IndexError:
             return qname
 
+        if name_table is not None and ':' not in qname and qname in name_table:
+            return qname  # local names found in the name table are not mapped
+
+        try:
+            return self._unmapped_qnames[qname]
+        except KeyError:
+            pass
+
         try:
             prefix, name = qname.split(':', 1)
         except ValueError:
-            if not self._namespaces.get(''):
-                return qname
-            elif name_table is None or qname not in name_table:
-                return '{%s}%s' % (self._namespaces.get(''), qname)
-            else:
-                return qname
+            default_namespace = self._namespaces.get('')
+            result = '{%s}%s' % (default_namespace, qname) if default_namespace else qname
         else:
             try:
                 uri = self._namespaces[prefix]
             except KeyError:
-                return qname
+                result = qname
             else:
-                return u'{%s}%s' % (uri, name) if uri else name
+                result = u'{%s}%s' % (uri, name) if uri else name
+
+        self._unmapped_qnames[qname] = result
+        return result
 
     def transfer(self, other):
         transferred = []
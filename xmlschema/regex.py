@@ -16,7 +16,7 @@ import re
 from itertools import chain
 from sys import maxunicode
 
-from .compat import PY3, unicode_type, string_base_type, MutableSet
+from .compat import PY3, unicode_type, string_base_type, MutableSet, lru_cache
 from .exceptions import XMLSchemaValueError, XMLSchemaRegexError
 from .codepoints import UnicodeSubset, UNICODE_CATEGORIES, unicode_subset
 
@@ -252,9 +252,80 @@ def parse_character_class(xml_regex, class_pos, xsd_version='1.0'):
     return char_group, pos
 
 
+def get_character_class_end(xml_regex, class_pos):
+    """
+    Returns the position of the closing bracket of a character class, including
+    the nested character classes of subtractions. The content of the class is
+    not checked, so the result is meaningful only for well-formed classes.
+
+    :param xml_regex: the source XML Schema regular expression.
+    :param class_pos: the position of the character class in the source string, \
+    must coincide with a '[' character.
+    """
+    depth = 0
+    pos = class_pos
+    while True:
+        ch = xml_regex[pos]
+        if ch == '\\':
+            pos += 2
+            continue
+        elif ch == '[':
+            depth += 1
+        elif ch == ']':
+            depth -= 1
+            if not depth:
+                return pos
+        pos += 1
+
+
+def translate_character_class(xml_regex, class_pos, xsd_version='1.0'):
+    """
+    Translates a character class of an XML Schema regular expression
+    to a Python regex character class.
+
+    :return: the translated character class and the last position of the character class.
+    """
+    char_group, pos = parse_character_class(xml_regex, class_pos, xsd_version)
+    char_group_repr = unicode_type(char_group)
+    if char_group_repr == '[^]':
+        return r'[\w\W]', pos
+    elif char_group_repr == '[]':
+        return r'[^\w\W]', pos
+    else:
+        return char_group_repr, pos
+
+
+@lru_cache(maxsize=1024)
+def get_character_class_regex(xml_class, xsd_version='1.0'):
+    """
+    Cached translation of a well-formed XML Schema regex character class.
+
+    :param xml_class: the source character class, enclosed in square brackets.
+    :param xsd_version: the version of the XML Schema processor ('1.0' or '1.1') \
+    that called the regular expression parsing.
+    """
+    return translate_character_class(xml_class, 0, xsd_version)[0]
+
+
+@lru_cache(maxsize=256)
+def get_unicode_subset_regex(name, negative=False, xsd_version='1.0'):
+    """
+    Cached translation of a Unicode block or category escape (eg. \\p{L} or \\P{IsBasicLatin}).
+
+    :param name: the name of the Unicode block or category.
+    :param negative: if `True` translates the complement of the Unicode subset.
+    :param xsd_version: the version of the XML Schema processor ('1.0' or '1.1') \
+    that called the regular expression parsing.
+    """
+    p_shortcut_set = unicode_subset(name, xsd_version > '1.0')
+    return '[^%s]' % p_shortcut_set if negative else '[%s]' % p_shortcut_set
+
+
+@lru_cache(maxsize=1024)
 def get_python_regex(xml_regex, xsd_version='1.0'):
     """
     Translates an XML regex expression to a Python compatible expression.
+    The translations are cached, keyed by the source expression and the XSD version.
 
     :param xml_regex: the source XML Schema regular expression.
     :param xsd_version: the version of the XML Schema processor ('1.0' or '1.1') \
@@ -279,19 +350,18 @@ def get_python_regex(xml_regex, xsd_version='1.0'):
             regex.append(r'\%s' % ch)
         elif ch == '[':
             try:
-                char_group, pos = parse_character_class(xml_regex, pos, xsd_version)
+                try:
+                    end_pos = get_character_class_end(xml_regex, pos)
+                    regex.append(get_character_class_regex(xml_regex[pos:end_pos + 1], xsd_version))
+                    pos = end_pos
+                except (IndexError, XMLSchemaRegexError):
+                    # Translates again for reporting errors about the full expression
+                    char_group_regex, pos = translate_character_class(xml_regex, pos, xsd_version)
+                    regex.append(char_group_regex)
             except IndexError:
                 raise XMLSchemaRegexError(
                     "unterminated character group at position %d: %r" % (pos, xml_regex)
                 )
-            else:
-                char_group_repr = unicode_type(char_group)
-                if char_group_repr == '[^]':
-                    regex.append(r'[\w\W]')
-                elif char_group_repr == '[]':
-                    regex.append(r'[^\w\W]')
-                else:
-                    regex.append(char_group_repr)
 
         elif ch == '{':
             if pos == 0:
@@ -350,11 +420,9 @@ def get_python_regex(xml_regex, xsd_version='1.0'):
                     raise XMLSchemaRegexError(
                         "truncated unicode block escape at position %d: %r" % (block_pos, xml_regex))
 
-                p_shortcut_set = unicode_subset(xml_regex[block_pos + 3:pos], xsd_version > '1.0')
-                if xml_regex[block_pos + 1] == 'p':
-                    regex.append('[%s]' % p_shortcut_set)
-                else:
-                    regex.append('[^%s]' % p_shortcut_set)
+                regex.append(get_unicode_subset_regex(
+                    xml_regex[block_pos + 3:pos], xml_regex[block_pos + 1] == 'P', xsd_version
+                ))
             else:
                 regex.append('\\%s' % xml_regex[pos])
         else:
@@ -365,3 +433,16 @@ def get_python_regex(xml_regex, xsd_version='1.0'):
         raise XMLSchemaRegexError("unterminated subpattern in expression: %r" % xml_regex)
     regex.append(r')$')
     return ''.join(regex)
+
+
+@lru_cache(maxsize=1024)
+def compile_xsd_regex(xml_regex, xsd_version='1.0'):
+    """
+    Translates an XML regex expression and compiles it to a Python regex object.
+    Results are cached and shared by all the schema instances of the process.
+
+    :param xml_regex: the source XML Schema regular expression.
+    :param xsd_version: the version of the XML Schema processor ('1.0' or '1.1') \
+    that called the regular expression parsing.
+    """
+    return re.compile(get_python_regex(xml_regex, xsd_version))
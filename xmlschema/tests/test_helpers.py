@@ -19,7 +19,7 @@ import xml.etree.ElementTree as ElementTree
 
 from xmlschema import XMLSchema, XMLSchemaParseError
 from xmlschema.etree import etree_element, prune_etree
-from xmlschema.namespaces import XSD_NAMESPACE, XSI_NAMESPACE
+from xmlschema.namespaces import XSD_NAMESPACE, XSI_NAMESPACE, NamespaceMapper
 from xmlschema.helpers import get_xsd_annotation, get_namespace, get_qname, local_name, \
     qname_to_prefixed, get_xsd_derivation_attribute
 from xmlschema.qnames import XSI_TYPE, XSD_SCHEMA, XSD_ELEMENT, XSD_SIMPLE_TYPE, XSD_ANNOTATION
@@ -139,6 +139,28 @@ class TestHelpers(unittest.TestCase):
         elem.append(etree_element(XSD_SIMPLE_TYPE))
         self.assertEqual(component._parse_child_component(elem), elem[2])
 
+    def test_namespace_mapper(self):
+        mapper = NamespaceMapper({'xs': XSD_NAMESPACE, 'tns': 'http://example.test/ns'})
+        self.assertEqual(mapper.map_qname(XSD_ELEMENT), 'xs:element')
+        self.assertEqual(mapper.map_qname('{http://example.test/ns}a'), 'tns:a')
+        self.assertEqual(mapper.map_qname('{http://example.test/other}a'), '{http://example.test/other}a')
+        self.assertEqual(mapper.map_qname('a'), 'a')
+        self.assertEqual(mapper.unmap_qname('xs:element'), XSD_ELEMENT)
+        self.assertEqual(mapper.unmap_qname('foo:a'), 'foo:a')
+        self.assertEqual(mapper.unmap_qname('a'), 'a')
+
+        # The cached names are refreshed when the namespace map changes
+        mapper['foo'] = 'http://example.test/ns'
+        self.assertEqual(mapper.unmap_qname('foo:a'), '{http://example.test/ns}a')
+        del mapper['tns']
+        self.assertEqual(mapper.map_qname('{http://example.test/ns}a'), 'foo:a')
+        mapper[''] = 'http://example.test/ns'
+        self.assertEqual(mapper.unmap_qname('a'), '{http://example.test/ns}a')
+        self.assertEqual(mapper.unmap_qname('a', name_table={'a'}), 'a')
+        mapper.clear()
+        self.assertEqual(mapper.map_qname(XSD_ELEMENT), XSD_ELEMENT)
+        self.assertEqual(mapper.unmap_qname('xs:element'), 'xs:element')
+
 
 class TestElementTreeHelpers(unittest.TestCase):
 
@@ -185,6 +185,13 @@ class TestModelValidation(XsdValidatorTestCase):
         self.check_advance_false(model, [(group, 0, group[:])])  # <other> not match with <union>
         self.assertIsNone(model.element)
 
+        model = ModelVisitor(group)
+        model.expected_details = False
+        self.check_advance_false(model)
+        self.check_advance_false(model)
+        self.check_advance_false(model, [(group, 0, None)])  # No expected elements list
+        self.assertIsNone(model.element)
+
     def test_simple_restriction_model(self):
         """
         <xs:group name="facets">
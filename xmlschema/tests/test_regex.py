@@ -23,7 +23,8 @@ from xmlschema.exceptions import XMLSchemaValueError, XMLSchemaRegexError
 from xmlschema.compat import unicode_chr
 from xmlschema.codepoints import code_point_repr, iterparse_character_group, iter_code_points, \
     UnicodeSubset, build_unicode_categories, UNICODE_CATEGORIES
-from xmlschema.regex import get_python_regex, XsdRegexCharGroup
+from xmlschema.regex import get_python_regex, get_character_class_end, \
+    get_character_class_regex, get_unicode_subset_regex, XsdRegexCharGroup
 
 
 class TestCodePoints(unittest.TestCase):
@@ -390,6 +391,30 @@ class TestPatterns(unittest.TestCase):
         self.assertEqual(regex, r'^([^\w\W])$')
         self.assertRaises(XMLSchemaRegexError, get_python_regex, '[]')
 
+    def test_character_class_end(self):
+        self.assertEqual(get_character_class_end('[a-z]+', 0), 4)
+        self.assertEqual(get_character_class_end(r'x[\]\[]', 1), 6)
+        self.assertEqual(get_character_class_end('[a-z-[aeiou]]b', 0), 12)
+        self.assertRaises(IndexError, get_character_class_end, '[a-z', 0)
+
+    def test_translation_errors(self):
+        with self.assertRaises(XMLSchemaRegexError) as ctx:
+            get_python_regex('abc[a-[b]')
+        self.assertIn('abc[a-[b]', str(ctx.exception))
+        self.assertRaises(XMLSchemaRegexError, get_python_regex, '[a[b]]')
+        self.assertRaises(XMLSchemaRegexError, get_python_regex, 'x[]y')
+
+    @unittest.skipIf(sys.version_info < (3,), "Python 2.7 has a fake lru_cache")
+    def test_translation_cache(self):
+        regex = get_python_regex(r'[\i-[:]][\c-[:]]*\p{Lu}')
+        self.assertIs(get_python_regex(r'[\i-[:]][\c-[:]]*\p{Lu}'), regex)
+        self.assertIsNot(get_python_regex(r'[\i-[:]][\c-[:]]*\p{Lu}', '1.1'), regex)
+
+        hits = get_character_class_regex.cache_info().hits
+        get_python_regex(r'[\i-[:]]+')
+        self.assertEqual(get_character_class_regex.cache_info().hits, hits + 1)
+        self.assertEqual(get_unicode_subset_regex('Lu'), '[%s]' % UNICODE_CATEGORIES['Lu'])
+
 
 if __name__ == '__main__':
     from xmlschema.tests import print_test_header
@@ -11,19 +11,29 @@
 #
 import unittest
 import os
+import json
+from array import array
+import sys
 from decimal import Decimal
 import base64
 from elementpath import datatypes
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 import xmlschema
 from xmlschema import XMLSchemaValidationError, ParkerConverter, BadgerFishConverter, \
     AbderaConverter, JsonMLConverter
 
-from xmlschema.converters import UnorderedConverter
-from xmlschema.compat import unicode_type, ordered_dict_class
+from xmlschema.converters import UnorderedConverter, ColumnarConverter, ColumnarData, INT_TYPECODE
+from xmlschema.compat import unicode_type, ordered_dict_class, StringIO
+from xmlschema.exceptions import XMLSchemaTypeError, XMLSchemaValueError
 from xmlschema.etree import ElementTree, lxml_etree
 from xmlschema.tests import XsdValidatorTestCase
 from xmlschema.validators import XMLSchema11
+from xmlschema.validators.elements import XsdElementTask
 
 VEHICLES_DICT = {
     '@xmlns:vh': 'http://example.com/vehicles',
@@ -337,6 +347,39 @@ class TestDecoding(XsdValidatorTestCase):
         os.remove(self.col_json_file)
         self.check_etree_elements(col_xml_tree, root)
 
+    def test_json_streaming(self):
+        objects = self.col_schema.to_dict(self.col_xml_file, 'object', decimal_type=float)
+        self.assertEqual(len(objects), 2)
+
+        json_data = xmlschema.to_json(self.col_xml_file, schema=self.col_schema, path='object')
+        self.assertEqual(json.loads(json_data), objects)
+        self.assertEqual(json_data, json.dumps(objects))
+
+        json_data = xmlschema.to_json(self.col_xml_file, schema=self.col_schema, path='object[1]')
+        self.assertEqual(json.loads(json_data), objects[0])
+
+        fp = StringIO()
+        self.assertIsNone(xmlschema.to_json(self.col_xml_file, fp, schema=self.col_schema,
+                                            path='object', lazy=True, lines=True))
+        lines = fp.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual([json.loads(line) for line in lines], objects)
+
+        with self.assertRaises(XMLSchemaValueError):
+            xmlschema.to_json(self.col_xml_file, schema=self.col_schema, path='object',
+                              lines=True, json_options={'indent': 2})
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed.")
+    def test_json_list_array(self):
+        schema = self.get_schema("""
+            <xs:element name="values">
+                <xs:simpleType>
+                    <xs:list itemType="xs:decimal"/>
+                </xs:simpleType>
+            </xs:element>""")
+        json_data = xmlschema.to_json('<values>1.5 2</values>', schema=schema, list_array=True)
+        self.assertEqual(json.loads(json_data), [1.5, 2.0])
+
     def test_path(self):
         xt = ElementTree.parse(self.vh_xml_file)
         xd = self.vh_schema.to_dict(xt, '/vh:vehicles/vh:cars', namespaces=self.vh_namespaces)
@@ -419,6 +462,33 @@ class TestDecoding(XsdValidatorTestCase):
         json_ml_dict = self.col_schema.to_dict(self.col_xml_file, converter=JsonMLConverter)
         self.assertEqual(json_ml_dict, COLLECTION_JSON_ML)
 
+    def test_columnar_converter(self):
+        data = xmlschema.to_columns(self.col_xml_file, 'object', schema=self.col_schema, lazy=True)
+        self.assertEqual(data.size, 2)
+        self.assertEqual(list(data), ['@id', '@available', 'position', 'title', 'year', 'author/@id',
+                                      'author/name', 'author/born', 'author/dead',
+                                      'author/qualification', 'estimation'])
+        self.assertEqual(data['@id'], ['b0836217462', 'b0836217463'])
+        self.assertEqual(data['position'], array(INT_TYPECODE, [1, 2]))
+        self.assertEqual(data['title'], ['The Umbrellas', None])
+        self.assertEqual(data.masks['title'], array('b', [0, 1]))
+        self.assertEqual(data['estimation'][0], 10000.0)
+        self.assertEqual(data.masks['estimation'], array('b', [0, 1]))
+
+        data = ColumnarData()
+        data.append([('a', 1), ('b', 1.5)])
+        data.append([('a', 2**70), ('c', 'x'), ('c', 'y'), ('c', 'z')])
+        data.append([('', 'text'), ('a', None)])
+        self.assertEqual(data['a'], [1, 2**70, None])
+        self.assertEqual(data['b'][0], 1.5)
+        self.assertEqual(data.masks['b'], array('b', [0, 1, 1]))
+        self.assertEqual(data['c'], [None, ['x', 'y', 'z'], None])
+        self.assertEqual(data['$'], [None, None, 'text'])
+
+        with self.assertRaises(XMLSchemaTypeError) as ctx:
+            self.col_schema.encode({}, converter=ColumnarConverter)
+        self.assertIn("columnar converter is decode-only", str(ctx.exception))
+
     def test_dict_granularity(self):
         """Based on Issue #22, test to make sure an xsd indicating list with
         dictionaries, returns just that even when it has a single dict. """
@@ -598,6 +668,63 @@ class TestDecoding(XsdValidatorTestCase):
         self.assertEqual(schema.to_dict("<simple_root/>"), 'default_value')
         self.assertIsNone(schema.to_dict("<simple_root/>", use_defaults=False))
 
+    def test_cached_fixed_and_default_values(self):
+        schema = self.get_schema("""
+        <xs:element name="root">
+          <xs:complexType>
+            <xs:sequence>
+              <xs:element name="version" type="xs:decimal" fixed="1.0"/>
+              <xs:element name="size" type="xs:decimal" default="2.5" maxOccurs="unbounded"/>
+              <xs:element name="sizes" type="sizeList" default="1 2"/>
+            </xs:sequence>
+            <xs:attribute name="ratio" type="xs:decimal" default="0.5"/>
+            <xs:attribute name="unit" type="xs:string" fixed="mm"/>
+          </xs:complexType>
+        </xs:element>
+        <xs:simpleType name="sizeList">
+          <xs:list itemType="xs:int"/>
+        </xs:simpleType>""")
+
+        xml_data = '<root><version>1.00</version><size/><size>3</size><size/><sizes/></root>'
+        for _ in range(2):
+            self.assertEqual(schema.to_dict(xml_data), {
+                '@ratio': Decimal('0.5'), '@unit': 'mm', 'version': Decimal('1.00'),
+                'size': [Decimal('2.5'), Decimal('3'), Decimal('2.5')], 'sizes': [1, 2]
+            })
+            self.assertEqual(schema.to_dict(xml_data, decimal_type=float), {
+                '@ratio': 0.5, '@unit': 'mm', 'version': 1.0, 'size': [2.5, 3.0, 2.5], 'sizes': [1, 2]
+            })
+
+        xsd_element = schema.elements['root'].type.content_type[1]
+        self.assertIn((xsd_element.type, '2.5', None, None), xsd_element._decoded_values)
+        self.assertIn((xsd_element.type, '2.5', float, None), xsd_element._decoded_values)
+
+        data = schema.to_dict(xml_data)
+        self.assertIsNot(data['sizes'], schema.to_dict(xml_data)['sizes'])
+
+        self.check_decode(schema, '<root><version>1.01</version><size/><sizes/></root>',
+                          XMLSchemaValidationError)
+        self.check_decode(schema, '<root unit="cm"><version>1</version><size/><sizes/></root>',
+                          XMLSchemaValidationError)
+
+    def test_cached_invalid_default_values(self):
+        schema = self.schema_class("""<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+            <xs:element name="root">
+              <xs:complexType>
+                <xs:sequence>
+                  <xs:element name="size" type="xs:int" default="abc"/>
+                </xs:sequence>
+                <xs:attribute name="ratio" type="xs:int" default="xyz"/>
+              </xs:complexType>
+            </xs:element>
+        </xs:schema>""", validation='lax')
+
+        xml_data = '<root ratio="xyz"><size>abc</size></root>'
+        self.assertEqual(schema.decode(xml_data, validation='skip'), {'@ratio': 'xyz', 'size': 'abc'})
+        with self.assertRaises(XMLSchemaValidationError):
+            schema.decode(xml_data)
+        self.assertEqual(len(schema.decode(xml_data, validation='lax')[1]), 2)
+
     def test_validation_errors(self):
         xsd_text = """<?xml version="1.0" encoding="utf-8"?>
             <xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
@@ -638,6 +765,126 @@ class TestDecoding(XsdValidatorTestCase):
         self.assertEqual(message_lines[-4].strip(), rotation_data)
         self.assertEqual(message_lines[-2], 'Path: /tns:rotation')
 
+    def test_deeply_nested_elements(self):
+        schema = self.check_schema("""
+            <xs:element name="node">
+              <xs:complexType>
+                <xs:sequence>
+                  <xs:element ref="node" minOccurs="0"/>
+                </xs:sequence>
+                <xs:attribute name="depth" type="xs:int"/>
+              </xs:complexType>
+            </xs:element>""")
+
+        depth = sys.getrecursionlimit() * 3
+        xml_data = ''.join('<node depth="%d">' % k for k in range(depth)) + '</node>' * depth
+        self.assertTrue(schema.is_valid(xml_data))
+
+        obj = schema.decode(xml_data)
+        for k in range(depth - 1):
+            self.assertEqual(obj['@depth'], k)
+            obj = obj['node']
+        self.assertEqual(obj, {'@depth': depth - 1})
+
+        xml_data = xml_data.replace('depth="%d"' % (depth - 1), 'depth="wrong"')
+        errors = list(schema.iter_errors(xml_data))
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].path.count('node'), depth)
+
+    def test_model_group_and_attribute_group_decoding(self):
+        schema = self.check_schema("""
+            <xs:element name="root">
+              <xs:complexType>
+                <xs:sequence>
+                  <xs:element name="a" type="xs:int" maxOccurs="unbounded"/>
+                </xs:sequence>
+                <xs:attribute name="id" type="xs:int" use="required"/>
+              </xs:complexType>
+            </xs:element>""")
+        xsd_type = schema.elements['root'].type
+        root = ElementTree.XML('<root id="1"><a>1</a><a>2</a></root>')
+
+        content = xsd_type.content_type.decode(root)
+        self.assertEqual([(tag, value) for tag, value, _ in content], [('a', 1), ('a', 2)])
+        self.assertEqual(xsd_type.attributes.decode(root.attrib), [('id', 1)])
+
+        root = ElementTree.XML('<root><a>1</a><a>two</a></root>')
+        content, errors = xsd_type.content_type.decode(root, validation='lax')
+        self.assertEqual([value for _, value, _ in content], [1, None])
+        self.assertEqual(len(errors), 1)
+        attributes, errors = xsd_type.attributes.decode(root.attrib, validation='lax')
+        self.assertEqual(attributes, [])
+        self.assertIn('missing required attribute', errors[0].reason)
+
+    def test_raw_decode_context(self):
+        schema = self.check_schema("""
+            <xs:simpleType name="myInt">
+              <xs:restriction base="xs:int"/>
+            </xs:simpleType>
+            <xs:element name="root">
+              <xs:complexType>
+                <xs:sequence>
+                  <xs:element name="a" type="myInt" maxOccurs="unbounded"/>
+                </xs:sequence>
+                <xs:attribute name="id" type="myInt"/>
+              </xs:complexType>
+            </xs:element>""")
+        xsd_type = schema.types['myInt']
+        contexts = []
+
+        def raw_decode(obj, context, errors):
+            contexts.append(context)
+            return xsd_type.__class__._raw_decode(xsd_type, obj, context, errors)
+
+        # The raw decoders of a decoding run share the same context
+        xsd_type._raw_decode = raw_decode
+        try:
+            self.assertEqual(schema.decode('<root id="1"><a>2</a><a>3</a></root>', decimal_type=float),
+                             {'@id': 1, 'a': [2, 3]})
+        finally:
+            del xsd_type._raw_decode
+        self.assertEqual(len(contexts), 3)
+        self.assertTrue(all(c is contexts[0] for c in contexts))
+        self.assertIs(contexts[0].decimal_type, float)
+
+        errors = []
+        self.assertEqual(xsd_type.raw_decode('4', 'lax', errors), 4)
+        self.assertIsNone(xsd_type.raw_decode('four', 'lax', errors))
+        self.assertEqual(len(errors), 1)
+
+    def test_child_decoded_only_with_errors(self):
+        schema = self.check_schema("""
+            <xs:element name="root">
+              <xs:complexType>
+                <xs:sequence>
+                  <xs:element name="a" type="xs:int"/>
+                  <xs:element name="b">
+                    <xs:complexType>
+                      <xs:sequence>
+                        <xs:element name="c" type="xs:int"/>
+                      </xs:sequence>
+                    </xs:complexType>
+                  </xs:element>
+                </xs:sequence>
+              </xs:complexType>
+            </xs:element>""")
+        xsd_element = schema.elements['root'].type.content_type[1]
+
+        def iter_decode_only_errors(elem, context, level):
+            for result in xsd_element.__class__._iter_decode(xsd_element, elem, context, level):
+                if isinstance(result, (XMLSchemaValidationError, XsdElementTask)):
+                    yield result
+            yield xsd_element.validation_error(context.validation, "no data", elem)
+
+        # The data of a previous sibling or of a child is not inherited
+        xsd_element._iter_decode = iter_decode_only_errors
+        try:
+            data, errors = schema.decode('<root><a>1</a><b><c>2</c></b></root>', validation='lax')
+        finally:
+            del xsd_element._iter_decode
+        self.assertEqual(data, {'a': 1, 'b': None})
+        self.assertEqual(len(errors), 1)
+
 
 class TestDecoding11(TestDecoding):
     schema_class = XMLSchema11
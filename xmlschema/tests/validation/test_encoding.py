@@ -12,10 +12,12 @@
 import sys
 import unittest
 
+import xmlschema
 from xmlschema import XMLSchemaEncodeError, XMLSchemaValidationError
 from xmlschema.converters import UnorderedConverter
-from xmlschema.compat import unicode_type, ordered_dict_class
-from xmlschema.etree import etree_element, etree_tostring, is_etree_element, ElementTree
+from xmlschema.compat import unicode_type, ordered_dict_class, StringIO
+from xmlschema.etree import etree_element, etree_tostring, etree_serialize, etree_namespace_declarations, \
+    is_etree_element, ElementTree
 from xmlschema.validators.exceptions import XMLSchemaChildrenValidationError
 from xmlschema.helpers import local_name
 from xmlschema.tests import XsdValidatorTestCase
@@ -382,6 +384,59 @@ class TestEncoding(XsdValidatorTestCase):
         root = schema.to_etree({"A": [1, 2], "B": [3, 4]}, unordered=True)
         self.assertListEqual([e.text for e in root], ['1', '3', '2', '4'])
 
+    def test_streaming_serialization(self):
+        filename = self.casepath('examples/collection/collection.xml')
+        data = self.col_schema.to_dict(filename)
+        elem = self.col_schema.encode(data)
+
+        fp = StringIO()
+        self.assertIsNone(xmlschema.write_xml(data, fp, self.col_schema))
+        self.assertEqual(fp.getvalue(), etree_tostring(elem))
+
+        objects = data.pop('object')
+        fp = StringIO()
+        xmlschema.write_xml(data, fp, self.col_schema, content=(('object', obj) for obj in objects))
+        self.assertEqual(fp.getvalue(), etree_tostring(elem))
+        self.assertTrue(self.col_schema.is_valid(ElementTree.fromstring(fp.getvalue())))
+
+        # The children don't repeat the namespace declarations of the root
+        data = self.vh_schema.to_dict(self.casepath('examples/vehicles/vehicles.xml'))
+        fp = StringIO()
+        xmlschema.write_xml(data, fp, self.vh_schema)
+        self.assertEqual(fp.getvalue(), etree_tostring(self.vh_schema.encode(data)))
+        self.assertEqual(fp.getvalue().count('xmlns:vh='), 1)
+
+        elem = ElementTree.Element('{http://example.com/vehicles}cars')
+        declarations = etree_namespace_declarations(etree_serialize(elem))
+        self.assertEqual(list(declarations.values()), ['http://example.com/vehicles'])
+        self.assertEqual(etree_serialize(elem, declarations), etree_serialize(elem).replace(
+            ' xmlns:%s="http://example.com/vehicles"' % list(declarations)[0], ''
+        ))
+        self.assertEqual(etree_serialize(elem, {'vh': 'http://example.com/other'}), etree_serialize(elem))
+
+        schema = self.get_schema("""
+            <xs:element name="foo">
+                <xs:complexType>
+                    <xs:sequence>
+                        <xs:element name="A" type="xs:integer" maxOccurs="unbounded"/>
+                        <xs:element name="B" type="xs:string"/>
+                    </xs:sequence>
+                </xs:complexType>
+            </xs:element>
+            """)
+        chunks = list(schema.iter_serialize({'A': [1, 2]}, 'foo', content=iter([('B', 'x & y')])))
+        self.assertEqual(''.join(chunks), '<foo>\n    <A>1</A>\n    <A>2</A>\n    <B>x &amp; y</B>\n</foo>')
+        self.assertEqual(len(chunks), 5)
+
+        with self.assertRaises(XMLSchemaChildrenValidationError):
+            xmlschema.write_xml({'A': [1, 2]}, StringIO(), schema, 'foo')
+
+        fp = StringIO()
+        errors = xmlschema.write_xml({'A': [1, 'two']}, fp, schema, 'foo', validation='lax')
+        self.assertEqual(len(errors), 3)
+        self.assertIsInstance(errors[-1], XMLSchemaChildrenValidationError)
+        self.assertTrue(fp.getvalue().endswith('</foo>'))
+
 
 class TestEncoding11(TestEncoding):
     schema_class = XMLSchema11
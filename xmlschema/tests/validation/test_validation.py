@@ -61,6 +61,97 @@ class TestValidation(XsdValidatorTestCase):
         vh_2_xt = ElementTree.parse(vh_2_file)
         self.assertRaises(XMLSchemaValidationError, xmlschema.validate, vh_2_xt, self.vh_xsd_file)
 
+    def test_max_errors(self):
+        schema = self.check_schema("""
+            <xs:element name="root">
+              <xs:complexType>
+                <xs:sequence>
+                  <xs:element name="a" type="xs:int" maxOccurs="unbounded"/>
+                  <xs:element name="b" type="xs:int"/>
+                </xs:sequence>
+              </xs:complexType>
+            </xs:element>
+            """)
+        xml_data = '<root><a>x</a><a>1</a><a>y</a><c/><a>z</a></root>'
+        self.assertEqual(len(list(schema.iter_errors(xml_data))), 4)
+        self.assertEqual(len(list(schema.iter_errors(xml_data, max_errors=2))), 2)
+
+        # In lax mode the decoding is completed, only the reported errors are limited
+        data, errors = schema.decode(xml_data, validation='lax', max_errors=2)
+        self.assertEqual(data, {'a': [None, 1, None, None]})
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(schema.decode(xml_data, validation='lax')[0], data)
+
+        data, errors = schema.decode('<root><a>1</a><c/><a>z</a></root>', validation='lax', max_errors=1)
+        self.assertEqual(data, schema.decode('<root><a>1</a><c/><a>z</a></root>', validation='lax')[0])
+        self.assertEqual(len(errors), 1)
+
+        # Fail-fast mode: the content after the first model error is skipped
+        errors = list(schema.iter_errors('<root><a>1</a><c/><a>z</a></root>', max_errors=1))
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].reason.startswith("Unexpected child with tag 'c'"))
+        self.assertFalse(schema.is_valid('<root><a>1</a><c/><a>z</a></root>'))
+        self.assertTrue(schema.is_valid('<root><a>1</a><b>2</b></root>'))
+
+    def test_validation_error_summary(self):
+        schema = self.check_schema("""
+            <xs:element name="root">
+              <xs:complexType>
+                <xs:sequence>
+                  <xs:element name="a" maxOccurs="unbounded">
+                    <xs:complexType>
+                      <xs:attribute name="id" type="xs:int" use="required"/>
+                    </xs:complexType>
+                  </xs:element>
+                </xs:sequence>
+              </xs:complexType>
+            </xs:element>
+            """)
+        xml_data = '<root>%s<a id="x"/></root>' % ''.join('<a id="%d" k="%d"/>' % (k, k) for k in range(10))
+
+        summary = xmlschema.ValidationErrorSummary(max_samples=3)
+        self.assertIs(summary.update(schema.iter_errors(xml_data)), summary)
+        self.assertEqual(summary.total, 11)
+        self.assertEqual(len(summary), 2)
+
+        groups = list(summary)
+        self.assertEqual(groups[0][2], 10)
+        self.assertEqual(len(groups[0][3]), 3)
+        self.assertEqual(groups[0][1], '... attribute not allowed for element.')
+        self.assertEqual(groups[1][2], 1)
+
+        report = summary.report()
+        self.assertTrue(report.startswith('11 validation errors in 2 groups'))
+        self.assertIn('Path: /root/a[1]', report)
+        self.assertNotIn('Path: /root/a[4]', report)
+
+        summary = xmlschema.ValidationErrorSummary()
+        xsd_element = schema.elements['root']
+        for k in range(5):
+            elem = ElementTree.Element('a')
+            summary.add(XMLSchemaValidationError(
+                xsd_element, elem, reason="%r at 0x%x has value %s" % (elem, id(elem) + k, 1.5 * k + 0.25)
+            ))
+        self.assertEqual(summary.total, 5)
+        self.assertEqual(len(summary), 1)
+        self.assertEqual(list(summary)[0][1], '... at ... has value ...')
+
+    def test_validation_error_lazy_attributes(self):
+        vh_2_file = self.casepath('examples/vehicles/vehicles-2_errors.xml')
+        namespaces = {'vhx': "http://example.com/vehicles"}
+        errors = list(self.vh_schema.iter_errors(vh_2_file, namespaces=namespaces))
+        self.assertEqual(len(errors), 2)
+        self.assertIsNone(errors[0]._path)
+        self.assertIsNone(errors[0]._message)
+        self.assertEqual(errors[0].path, '/vhx:vehicles/vhx:cars')
+        self.assertTrue(errors[0].message.startswith('failed validating <Element'))
+
+        source = xmlschema.XMLResource(vh_2_file, lazy=True)
+        errors = list(self.vh_schema.iter_errors(source, namespaces=namespaces))
+        self.assertEqual(len(errors), 2)
+        self.assertIsNone(errors[0].elem)
+        self.assertEqual(errors[0]._path, '/vhx:vehicles/vhx:cars')
+
     def test_document_validate_api_lazy(self):
         source = xmlschema.XMLResource(self.col_xml_file, lazy=True)
         namespaces = source.get_namespaces()
@@ -77,6 +168,56 @@ class TestValidation(XsdValidatorTestCase):
 
         self.assertIsNone(xmlschema.validate(self.col_xml_file, lazy=True))
 
+    def test_lazy_identities_validation(self):
+        schema = self.check_schema("""
+            <xs:element name="root">
+              <xs:complexType>
+                <xs:sequence>
+                  <xs:element name="item" maxOccurs="unbounded">
+                    <xs:complexType>
+                      <xs:sequence>
+                        <xs:element name="ref" minOccurs="0" maxOccurs="unbounded" type="xs:int"/>
+                      </xs:sequence>
+                      <xs:attribute name="id" type="xs:int"/>
+                    </xs:complexType>
+                  </xs:element>
+                </xs:sequence>
+              </xs:complexType>
+              <xs:key name="itemKey">
+                <xs:selector xpath="item"/>
+                <xs:field xpath="@id"/>
+              </xs:key>
+              <xs:keyref name="itemRef" refer="itemKey">
+                <xs:selector xpath="item/ref"/>
+                <xs:field xpath="."/>
+              </xs:keyref>
+            </xs:element>
+            """)
+
+        xml_data = '<root><item id="1"><ref>2</ref></item><item id="2"><ref>1</ref></item></root>'
+        self.assertTrue(schema.is_valid(xmlschema.XMLResource(xml_data, lazy=True)))
+
+        xml_data = '<root><item id="1"><ref>3</ref></item><item id="1"/></root>'
+        self.assertEqual(len(list(schema.iter_errors(xml_data))), 2)
+        errors = list(schema.iter_errors(xmlschema.XMLResource(xml_data, lazy=True)))
+        self.assertEqual(len(errors), 2)
+        self.assertIn('duplicated value', errors[0].reason)
+        self.assertIn('not found', errors[1].reason)
+
+    def test_lazy_validation_converter(self):
+
+        class CountingConverter(xmlschema.XMLSchemaConverter):
+            instances = 0
+
+            def __init__(self, *args, **kwargs):
+                type(self).instances += 1
+                super(CountingConverter, self).__init__(*args, **kwargs)
+
+        schema = self.schema_class(self.col_xsd_file, converter=CountingConverter)
+        CountingConverter.instances = 0
+        self.assertTrue(schema.is_valid(xmlschema.XMLResource(self.col_xml_file, lazy=True)))
+        self.assertEqual(CountingConverter.instances, 1)
+
 
 class TestValidation11(TestValidation):
     schema_class = XMLSchema11
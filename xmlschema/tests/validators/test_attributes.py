@@ -11,6 +11,7 @@
 #
 from __future__ import print_function, unicode_literals
 import unittest
+from decimal import Decimal
 
 from xmlschema import XMLSchemaParseError
 from xmlschema.tests import XsdValidatorTestCase
@@ -43,6 +44,61 @@ class TestXsdAttributes(XsdValidatorTestCase):
             """, validation='lax')
         self.assertTrue(isinstance(schema.all_errors[1], XMLSchemaParseError))
 
+    def test_attribute_group_decoding(self):
+        schema = self.check_schema("""
+            <xs:attributeGroup name="alpha">
+                <xs:attribute name="id" type="xs:string" use="required"/>
+                <xs:attribute name="unit" type="xs:string" default="mm"/>
+                <xs:attribute name="version" type="xs:int" fixed="2"/>
+                <xs:attribute name="scale" type="xs:int"/>
+                <xs:anyAttribute namespace="##other" processContents="skip"/>
+            </xs:attributeGroup>""")
+
+        attribute_group = schema.attribute_groups['alpha']
+        required, predefined, fixed_values, wildcard = attribute_group.get_decode_plan()
+        self.assertEqual(required, {'id'})
+        self.assertEqual(predefined, (('unit', 'mm', 'mm'), ('version', '2', 2)))
+        self.assertEqual(fixed_values, (('version', '2', 2),))
+        self.assertIs(wildcard, attribute_group[None])
+
+        self.assertEqual(attribute_group.decode({'id': 'a1', 'scale': '3'}),
+                         [('id', 'a1'), ('scale', 3), ('unit', 'mm'), ('version', 2)])
+        self.assertEqual(attribute_group.decode({'id': 'a1', 'unit': 'cm'}, use_defaults=False),
+                         [('id', 'a1'), ('unit', 'cm'), ('version', 2)])
+        self.assertEqual(attribute_group.decode({'id': 'a1', 'scale': '3'}, fill_missing=True),
+                         [('id', 'a1'), ('scale', 3), ('unit', 'mm'), ('version', 2)])
+        self.assertEqual(attribute_group.decode({'id': 'a1'}, use_defaults=False, fill_missing=True),
+                         [('id', 'a1'), ('version', 2), ('unit', None), ('scale', None)])
+        self.assertTrue(attribute_group.is_valid({'id': 'a1', '{http://xmlschema.test/ns}a': 'x'}))
+
+        errors = list(attribute_group.iter_errors({'scale': 'x', 'version': '3'}))
+        self.assertEqual(len(errors), 3)
+        self.assertIn("missing required attribute: 'id'", str(errors[0]))
+
+        del attribute_group['id']
+        self.assertEqual(attribute_group.get_decode_plan()[0], frozenset())
+        self.assertTrue(attribute_group.is_valid({'scale': '3'}))
+
+        schema = self.check_schema("""
+            <xs:attributeGroup name="beta">
+                <xs:attribute name="a" type="xs:string" use="required"/>
+                <xs:attribute name="b" type="xs:string" use="required"/>
+                <xs:attribute name="price" type="xs:decimal" default="1.50"/>
+                <xs:attribute name="sizes" type="xs:NMTOKENS" default="a b"/>
+            </xs:attributeGroup>""")
+
+        attribute_group = schema.attribute_groups['beta']
+        predefined = attribute_group.get_decode_plan()[1]
+        self.assertEqual(predefined, (('price', '1.50', Decimal('1.50')), ('sizes', 'a b', None)))
+        self.assertEqual(attribute_group.decode({'a': '1', 'b': '2'}, decimal_type=float),
+                         [('a', '1'), ('b', '2'), ('price', 1.5), ('sizes', ['a', 'b'])])
+        result = attribute_group.decode({'a': '1', 'b': '2'})
+        self.assertIsNot(result[3][1], attribute_group.decode({'a': '1', 'b': '2'})[3][1])
+
+        errors = list(attribute_group.iter_errors({}))
+        self.assertEqual([e.reason for e in errors],
+                         ["missing required attribute: 'a'", "missing required attribute: 'b'"])
+
 
 class TestXsd11Attributes(TestXsdAttributes):
 
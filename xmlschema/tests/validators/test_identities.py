@@ -11,10 +11,14 @@
 #
 from __future__ import print_function, unicode_literals
 import unittest
+from decimal import Decimal
 
-from xmlschema import XMLSchemaParseError
+from xmlschema import XMLSchemaParseError, XMLSchemaValidationError
 from xmlschema.tests import XsdValidatorTestCase
 from xmlschema.validators import XMLSchema11
+from xmlschema.etree import ElementTree, etree_iterpath
+from xmlschema.validators import schema as schema_module
+from xmlschema.validators.identities import KeyCounter, compile_simple_path, sqlite3
 
 
 class TestXsdIdentities(XsdValidatorTestCase):
@@ -44,6 +48,151 @@ class TestXsdIdentities(XsdValidatorTestCase):
             </xs:element>
             """, XMLSchemaParseError)
 
+    def test_key_and_keyref_validation(self):
+        schema = self.check_schema("""
+            <xs:element name="root">
+              <xs:complexType>
+                <xs:sequence>
+                  <xs:element name="item" maxOccurs="unbounded">
+                    <xs:complexType>
+                      <xs:attribute name="id" type="xs:int"/>
+                    </xs:complexType>
+                  </xs:element>
+                  <xs:element name="ref" minOccurs="0" maxOccurs="unbounded">
+                    <xs:complexType>
+                      <xs:attribute name="item" type="xs:int"/>
+                    </xs:complexType>
+                  </xs:element>
+                </xs:sequence>
+              </xs:complexType>
+              <xs:key name="itemKey">
+                <xs:selector xpath="item"/>
+                <xs:field xpath="@id"/>
+              </xs:key>
+              <xs:keyref name="itemRef" refer="itemKey">
+                <xs:selector xpath="ref"/>
+                <xs:field xpath="@item"/>
+              </xs:keyref>
+            </xs:element>
+            """)
+
+        key = schema.elements['root'].identities['itemKey']
+        keyref = schema.elements['root'].identities['itemRef']
+        self.assertTrue(schema.is_valid('<root><item id="1"/><item id="2"/><ref item="01"/></root>'))
+        self.assertEqual(list(key._xsd_fields), ['./item'])
+        self.assertEqual(list(keyref._xsd_fields), ['./ref'])
+
+        errors = list(schema.iter_errors('<root><item id="1"/><item id="1"/><ref item="2"/></root>'))
+        self.assertEqual(len(errors), 2)
+        self.assertIn('duplicated value', errors[0].reason)
+        self.assertIn('not found', errors[1].reason)
+
+    def test_simple_paths(self):
+        root = ElementTree.XML('<a xmlns:p="ns" id="0"><b id="1"><p:c id="2"/></b><b/><d><b id="3"/></d></a>')
+        namespaces = {'p': 'ns'}
+        self.assertListEqual(compile_simple_path('.', namespaces)(root), [root])
+        self.assertListEqual(compile_simple_path('@id', namespaces)(root), ['0'])
+        self.assertListEqual(compile_simple_path('./b/@id', namespaces)(root), ['1'])
+        self.assertListEqual(compile_simple_path('child::b/p:c/attribute::id', namespaces)(root), ['2'])
+        self.assertListEqual(compile_simple_path('.//b/@id', namespaces)(root), ['1', '3'])
+        self.assertListEqual(compile_simple_path('*/b', namespaces)(root), [root[2][0]])
+        self.assertIsNone(compile_simple_path('b|d', namespaces))
+        self.assertIsNone(compile_simple_path('@*', namespaces))
+        self.assertIsNone(compile_simple_path('p:*', namespaces))
+        self.assertIsNone(compile_simple_path('q:b', namespaces))
+
+        root = ElementTree.XML('<a xmlns:p="ns"><b><p:c/><b><b/></b></b><b/><d><b><p:c/></b></d></a>')
+        for path in ('.', 'b', './b/p:c', './/b', './/b/b', '*/b', './/p:c', './/*', 'b/*/b', 'x'):
+            simple_path = compile_simple_path(path, namespaces)
+            selected = simple_path(root)
+            self.assertListEqual(list(simple_path.iter_paths(root)),
+                                 [(e, p) for e, p in etree_iterpath(root) if e in selected])
+        self.assertListEqual([p for _, p in compile_simple_path('.//b/b', namespaces).iter_paths(root)],
+                             ['./b/b', './b/b/b'])
+
+        schema = self.check_schema("""
+            <xs:element name="primary_key" type="xs:string">
+              <xs:key name="key1">
+                <xs:selector xpath=".//item|."/>
+                <xs:field xpath="@id"/>
+              </xs:key>
+            </xs:element>""")
+        identity = schema.elements['primary_key'].identities['key1']
+        self.assertIsNone(identity.selector.accessor)
+        self.assertIsNotNone(identity.fields[0].accessor)
+
+    @unittest.skipIf(sqlite3 is None, "The sqlite3 library is not available.")
+    def test_key_counter(self):
+        counter = KeyCounter(threshold=2)
+        counter['a'] += 1
+        counter[(1,)] += 1
+        self.assertFalse(counter.spilled)
+        counter[('b', 2)] += 1
+        self.assertTrue(counter.spilled)
+
+        counter[(Decimal('1.0'),)] += 1
+        self.assertEqual(counter[(1,)], 2)
+        self.assertEqual(counter['c'], 0)
+        self.assertIn('a', counter)
+        self.assertNotIn('c', counter)
+        self.assertEqual(len(counter), 3)
+        self.assertEqual(dict(counter.items()), {'a': 1, (1,): 2, ('b', 2): 1})
+        del counter['a']
+        self.assertEqual(len(counter), 2)
+        counter.clear()
+        self.assertFalse(counter.spilled)
+        self.assertEqual(len(counter), 0)
+
+        counter['a'] += 1
+        counter.close()
+        self.assertEqual(counter['a'], 1)
+        counter['b'] = counter['c'] = 1
+        self.assertTrue(counter.spilled)
+        counter.close()
+        self.assertFalse(counter.spilled)
+
+    @unittest.skipIf(sqlite3 is None, "The sqlite3 library is not available.")
+    def test_spilled_key_tables_validation(self):
+        schema = self.check_schema("""
+            <xs:element name="root">
+              <xs:complexType>
+                <xs:sequence>
+                  <xs:element name="item" maxOccurs="unbounded">
+                    <xs:complexType>
+                      <xs:attribute name="id" type="xs:ID"/>
+                      <xs:attribute name="code" type="xs:int"/>
+                    </xs:complexType>
+                  </xs:element>
+                </xs:sequence>
+              </xs:complexType>
+              <xs:unique name="itemCode">
+                <xs:selector xpath="item"/>
+                <xs:field xpath="@code"/>
+              </xs:unique>
+            </xs:element>
+            """)
+        schema.key_store_threshold = 1
+        items = ''.join('<item id="i%d" code="%d"/>' % (k, k) for k in range(5))
+        self.assertTrue(schema.is_valid('<root>%s</root>' % items))
+        self.assertEqual(len(list(schema.iter_errors('<root>%s<item id="i1" code="2"/></root>' % items))), 2)
+
+        closed = []
+
+        class TrackedKeyCounter(KeyCounter):
+            def close(self):
+                closed.append(self.spilled)
+                super(TrackedKeyCounter, self).close()
+
+        schema_module.KeyCounter = TrackedKeyCounter
+        try:
+            self.assertTrue(schema.is_valid('<root>%s</root>' % items))
+            self.assertEqual(closed, [True])
+            with self.assertRaises(XMLSchemaValidationError):
+                schema.to_dict('<root>%s<item id="i1" code="2"/></root>' % items)
+            self.assertEqual(closed, [True, True])
+        finally:
+            schema_module.KeyCounter = KeyCounter
+
 
 class TestXsd11Identities(TestXsdIdentities):
 
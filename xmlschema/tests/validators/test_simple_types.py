@@ -11,9 +11,15 @@
 #
 from __future__ import print_function, unicode_literals
 import unittest
+from decimal import Decimal
 
-from xmlschema import XMLSchemaParseError
-from xmlschema.qnames import XSD_LIST, XSD_UNION
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from xmlschema import XMLSchemaParseError, XMLSchemaValidationError
+from xmlschema.qnames import XSD_LIST, XSD_UNION, XSD_ENUMERATION
 from xmlschema.tests import XsdValidatorTestCase
 from xmlschema.validators import XMLSchema11
 
@@ -119,6 +125,350 @@ class TestXsdSimpleTypes(XsdValidatorTestCase):
                 </xs:restriction>
             </xs:simpleType>""")
 
+    def test_enumeration_facets(self):
+        schema = self.check_schema("""
+            <xs:simpleType name="codes">
+                <xs:restriction base="xs:string">
+                    %s
+                </xs:restriction>
+            </xs:simpleType>
+            <xs:simpleType name="amounts">
+                <xs:restriction base="xs:decimal">
+                    <xs:enumeration value="1.0"/>
+                    <xs:enumeration value="2.50"/>
+                </xs:restriction>
+            </xs:simpleType>
+            <xs:simpleType name="dates">
+                <xs:restriction base="xs:dateTime">
+                    <xs:enumeration value="2000-01-01T12:00:00Z"/>
+                </xs:restriction>
+            </xs:simpleType>
+            <xs:simpleType name="lists">
+                <xs:restriction>
+                    <xs:simpleType>
+                        <xs:list itemType="xs:int"/>
+                    </xs:simpleType>
+                    <xs:enumeration value="1 2"/>
+                </xs:restriction>
+            </xs:simpleType>""" % '\n'.join(
+            '<xs:enumeration value="C%04d"/>' % k for k in range(2000)
+        ))
+        self.assertTrue(schema.types['codes'].is_valid('C1999'))
+        self.assertFalse(schema.types['codes'].is_valid('C2000'))
+        self.assertTrue(schema.types['amounts'].is_valid('1'))
+        self.assertTrue(schema.types['amounts'].is_valid('2.5'))
+        self.assertFalse(schema.types['amounts'].is_valid('2.51'))
+        self.assertTrue(schema.types['dates'].is_valid('2000-01-01T12:00:00Z'))
+        self.assertTrue(schema.types['dates'].is_valid('2000-01-01T13:00:00+01:00'))
+        self.assertFalse(schema.types['dates'].is_valid('2000-01-01T13:00:00Z'))
+        self.assertTrue(schema.types['lists'].is_valid('1 2'))
+        self.assertFalse(schema.types['lists'].is_valid('2 1'))
+
+        facet = schema.types['codes'].facets[XSD_ENUMERATION]
+        elem = facet[0]
+        del facet[0]
+        self.assertFalse(facet.is_enumerated('C0000'))
+        facet.insert(0, elem)
+        self.assertTrue(facet.is_enumerated('C0000'))
+        facet[0] = facet[1]
+        self.assertFalse(facet.is_enumerated('C0000'))
+        self.assertTrue(facet.is_enumerated('C0001'))
+
+    def test_pattern_facets(self):
+        schema = self.check_schema(r"""
+            <xs:simpleType name="taxId">
+                <xs:restriction base="xs:string">
+                    <xs:pattern value="[A-Z]{2}\d{6}"/>
+                    <xs:pattern value="\d{11}"/>
+                </xs:restriction>
+            </xs:simpleType>
+            <xs:simpleType name="shortTaxId">
+                <xs:restriction base="taxId">
+                    <xs:pattern value="[A-Z]{2}\d{6}"/>
+                </xs:restriction>
+            </xs:simpleType>""")
+        patterns = schema.types['taxId'].patterns
+        self.assertEqual(len(patterns), 2)
+        self.assertIs(patterns.patterns[0], schema.types['shortTaxId'].patterns.patterns[0])
+        self.assertTrue(schema.types['taxId'].is_valid('AB123456'))
+        self.assertTrue(schema.types['taxId'].is_valid('12345678901'))
+        self.assertFalse(schema.types['taxId'].is_valid('AB1234567'))
+        self.assertTrue(schema.types['shortTaxId'].is_valid('AB123456'))
+        self.assertFalse(schema.types['shortTaxId'].is_valid('12345678901'))
+
+        patterns.append(patterns[0])
+        self.assertEqual(patterns.regex.pattern, '|'.join(p.pattern for p in patterns.patterns))
+        del patterns[2]
+        self.assertFalse(schema.types['taxId'].is_valid('AB1234567'))
+
+    def test_values_cache(self):
+        schema = self.check_schema("""
+            <xs:simpleType name="currency">
+                <xs:restriction base="xs:token">
+                    <xs:enumeration value="EUR"/>
+                    <xs:enumeration value="USD"/>
+                </xs:restriction>
+            </xs:simpleType>
+            <xs:simpleType name="idCode">
+                <xs:restriction base="xs:ID">
+                    <xs:enumeration value="A1"/>
+                </xs:restriction>
+            </xs:simpleType>
+            <xs:simpleType name="amount">
+                <xs:restriction base="xs:decimal"/>
+            </xs:simpleType>""")
+
+        xsd_type = schema.types['currency']
+        self.assertEqual(xsd_type.get_values_cache(), {})
+        self.assertEqual(xsd_type.decode('EUR'), 'EUR')
+        self.assertEqual(xsd_type.decode(' USD '), 'USD')
+        self.assertFalse(xsd_type.is_valid('GBP'))
+        self.assertEqual(xsd_type.get_values_cache(), {'EUR': 'EUR', ' USD ': 'USD'})
+        self.assertEqual(xsd_type.decode('EUR', validation='skip'), 'EUR')
+
+        self.assertIsNone(schema.types['idCode'].get_values_cache())
+        self.assertIsNone(schema.types['amount'].get_values_cache())
+        self.assertIsInstance(self.xsd_types['boolean'].get_values_cache(), dict)
+        self.assertIs(self.xsd_types['boolean'].decode('true'), True)
+        self.assertIs(self.xsd_types['boolean'].decode('true'), True)
+
+        schema.values_cache_size = 1
+        xsd_type.get_values_cache().clear()
+        self.assertEqual(xsd_type.decode('EUR'), 'EUR')
+        self.assertEqual(xsd_type.decode('USD'), 'USD')
+        self.assertEqual(xsd_type.get_values_cache(), {'EUR': 'EUR'})
+
+        schema = self.check_schema("""
+            <xs:simpleType name="currency">
+                <xs:restriction base="xs:string">
+                    <xs:enumeration value="EUR"/>
+                </xs:restriction>
+            </xs:simpleType>""")
+        schema.values_cache_size = 0
+        self.assertEqual(schema.types['currency'].decode('EUR'), 'EUR')
+        self.assertEqual(schema.types['currency'].get_values_cache(), {})
+
+        # The setting of the validating schema applies also to the builtin types
+        schema = self.check_schema('<xs:element name="flag" type="xs:boolean"/>')
+        boolean_cache = self.xsd_types['boolean'].get_values_cache()
+        boolean_cache.clear()
+        schema.values_cache_size = 0
+        self.assertIs(schema.decode('<flag>true</flag>'), True)
+        self.assertTrue(schema.is_valid('<flag>1</flag>'))
+        self.assertEqual(boolean_cache, {})
+
+        schema.values_cache_size = 1024
+        self.assertIs(schema.decode('<flag>true</flag>'), True)
+        self.assertEqual(boolean_cache, {'true': True})
+
+    def test_union_candidate_types(self):
+        schema = self.check_schema("""
+            <xs:simpleType name="dateOrCode">
+                <xs:union memberTypes="xs:date xs:dateTime xs:gYear xs:boolean xs:integer xs:double xs:token"/>
+            </xs:simpleType>""")
+
+        xsd_type = schema.types['dateOrCode']
+        date_type, datetime_type, gyear_type, boolean_type, integer_type, double_type, token_type = \
+            xsd_type.member_types
+
+        self.assertEqual(xsd_type.get_candidate_types('2019-05-01'),
+                         [date_type, datetime_type, gyear_type, token_type])
+        self.assertEqual(xsd_type.get_candidate_types('2019'),
+                         [gyear_type, integer_type, double_type, token_type])
+        self.assertEqual(xsd_type.get_candidate_types('1'),
+                         [boolean_type, integer_type, double_type, token_type])
+        self.assertEqual(xsd_type.get_candidate_types('-INF'), [double_type, token_type])
+        self.assertEqual(xsd_type.get_candidate_types('ABC-12'), [token_type])
+
+        # The first member type that decodes the value is always chosen
+        for text in ('2019-05-01', '2019-05-01T10:00:00', '2019', '1', '0', '-12', '1e3',
+                     'INF', 'NaN', '2019-13-01', 'ABC-12', ' 10 '):
+            expected = None
+            for member_type in xsd_type.member_types:
+                if member_type.is_valid(text.strip()):
+                    expected = member_type.decode(text.strip())
+                    break
+            self.assertEqual(repr(xsd_type.decode(text)), repr(expected))
+
+    def test_list_batch_decoding(self):
+        schema = self.check_schema("""
+            <xs:simpleType name="doubleList">
+                <xs:list itemType="xs:double"/>
+            </xs:simpleType>
+            <xs:simpleType name="percentList">
+                <xs:list>
+                    <xs:simpleType>
+                        <xs:restriction base="xs:unsignedByte">
+                            <xs:maxInclusive value="100"/>
+                        </xs:restriction>
+                    </xs:simpleType>
+                </xs:list>
+            </xs:simpleType>
+            <xs:simpleType name="decimalList">
+                <xs:list itemType="xs:decimal"/>
+            </xs:simpleType>""")
+
+        xsd_type = schema.types['doubleList']
+        self.assertEqual(xsd_type.base_type.decode_batch(['1', '2.5E1', 'INF']), [1.0, 25.0, float('inf')])
+        self.assertEqual(repr(xsd_type.decode(' 1  -2.5 NaN ')), repr([1.0, -2.5, float('nan')]))
+        self.assertEqual(xsd_type.decode(''), [])
+
+        xsd_type = schema.types['percentList']
+        self.assertEqual(xsd_type.base_type.decode_batch(['0', '45', '100']), [0, 45, 100])
+        self.assertIsNone(xsd_type.base_type.decode_batch(['0', '101']))
+        self.assertIsNone(xsd_type.base_type.decode_batch(['-1', '10']))
+        self.assertEqual(xsd_type.decode('0 45 100'), [0, 45, 100])
+        self.assertFalse(xsd_type.is_valid('0 45 101'))
+        self.assertEqual(len(list(xsd_type.iter_errors('-1 45 101'))), 2)
+
+        xsd_type = schema.types['decimalList']
+        self.assertEqual(xsd_type.decode('1.5 -2'), [Decimal('1.5'), Decimal('-2')])
+        self.assertIsNone(xsd_type.base_type.decode_batch(['1.5', 'INF']))
+        self.assertFalse(xsd_type.is_valid('1.5 INF'))
+        self.assertIsNone(self.xsd_types['string'].decode_batch(['1', '2']))
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed.")
+    def test_list_array_decoding(self):
+        schema = self.check_schema("""
+            <xs:simpleType name="doubleList">
+                <xs:list itemType="xs:double"/>
+            </xs:simpleType>
+            <xs:simpleType name="shortList">
+                <xs:restriction>
+                    <xs:simpleType>
+                        <xs:list itemType="xs:short"/>
+                    </xs:simpleType>
+                    <xs:maxLength value="3"/>
+                </xs:restriction>
+            </xs:simpleType>
+            <xs:simpleType name="tokenList">
+                <xs:list itemType="xs:token"/>
+            </xs:simpleType>
+            <xs:element name="posList" type="doubleList"/>""")
+
+        array = schema.types['doubleList'].decode('1 2.5 INF', list_array=True)
+        self.assertIsInstance(array, numpy.ndarray)
+        self.assertEqual(array.dtype, numpy.float64)
+        self.assertEqual(array.tolist(), [1.0, 2.5, float('inf')])
+
+        array = schema.types['shortList'].decode('1 -2 3', list_array=True)
+        self.assertIsInstance(array, numpy.ndarray)
+        self.assertEqual(array.dtype, numpy.int64)
+        self.assertEqual(array.tolist(), [1, -2, 3])
+        with self.assertRaises(XMLSchemaValidationError):
+            schema.types['shortList'].decode('1 2 3 4', list_array=True)
+
+        self.assertEqual(schema.types['tokenList'].decode('a b', list_array=True), ['a', 'b'])
+        self.assertEqual(schema.types['doubleList'].decode('1 2'), [1.0, 2.0])
+
+        array = schema.decode('<posList>1.5 2.5</posList>', list_array=True)
+        self.assertIsInstance(array, numpy.ndarray)
+        self.assertEqual(array.tolist(), [1.5, 2.5])
+
+        array = schema.types['doubleList'].decode('1 2.5', list_array=True, decimal_type=str)
+        self.assertEqual(array.dtype, numpy.float64)
+
+        xsd_type = self.check_schema("""
+            <xs:simpleType name="decimalList">
+                <xs:list itemType="xs:decimal"/>
+            </xs:simpleType>""").types['decimalList']
+        self.assertEqual(xsd_type.decode('1.5 2', list_array=True).dtype, numpy.float64)
+        self.assertEqual(xsd_type.decode('1.5 2', list_array=True, decimal_type=float).dtype, numpy.float64)
+        self.assertEqual(xsd_type.decode('1.5 2', list_array=True, decimal_type=str),
+                         [Decimal('1.5'), Decimal('2')])
+
+    def test_white_space_normalization(self):
+        token_type = self.xsd_types['token']
+        normalized_string_type = self.xsd_types['normalizedString']
+        string_type = self.xsd_types['string']
+
+        text = 'alpha beta'
+        self.assertIs(token_type.normalize(text), text)
+        self.assertIs(normalized_string_type.normalize(text), text)
+        self.assertIs(string_type.normalize(' alpha\t'), ' alpha\t')
+
+        self.assertEqual(token_type.normalize(' alpha  beta '), 'alpha beta')
+        self.assertEqual(token_type.normalize('alpha\n\tbeta\r'), 'alpha beta')
+        self.assertEqual(token_type.normalize('alpha\xa0beta\u2003'), 'alpha beta')
+        self.assertEqual(token_type.normalize(b'alpha  beta'), 'alpha beta')
+        self.assertEqual(token_type.normalize(''), '')
+
+        self.assertEqual(normalized_string_type.normalize(' alpha\t\nbeta '), ' alpha  beta ')
+        self.assertEqual(normalized_string_type.normalize('alpha\x85beta'), 'alpha beta')
+        self.assertEqual(normalized_string_type.normalize('alpha\x07beta'), 'alpha\x07beta')
+
+    def test_raw_decode(self):
+        schema = self.check_schema("""
+            <xs:simpleType name="smallInt">
+              <xs:restriction base="xs:int">
+                <xs:maxInclusive value="10"/>
+              </xs:restriction>
+            </xs:simpleType>""")
+        int_type = self.xsd_types['int']
+        small_int_type = schema.types['smallInt']
+
+        errors = []
+        self.assertEqual(int_type.raw_decode('5', 'lax', errors), 5)
+        self.assertEqual(small_int_type.raw_decode('5', 'lax', errors), 5)
+        self.assertListEqual(errors, [])
+
+        self.assertIsNone(int_type.raw_decode('five', 'lax', errors))
+        self.assertEqual(small_int_type.raw_decode('15', 'lax', errors), 15)
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(all(isinstance(e, XMLSchemaValidationError) for e in errors))
+        self.assertRaises(XMLSchemaValidationError, int_type.raw_decode, 'five', 'strict', errors)
+        self.assertEqual(int_type.raw_decode('five', 'skip', errors), 'five')
+
+    def test_decimal_type_decoding(self):
+        schema = self.check_schema("""
+            <xs:simpleType name="price">
+                <xs:restriction base="xs:decimal">
+                    <xs:minInclusive value="0.1"/>
+                    <xs:totalDigits value="4"/>
+                </xs:restriction>
+            </xs:simpleType>
+            <xs:simpleType name="positivePrice">
+                <xs:restriction base="xs:decimal">
+                    <xs:minExclusive value="0"/>
+                    <xs:totalDigits value="4"/>
+                </xs:restriction>
+            </xs:simpleType>
+            <xs:simpleType name="code">
+                <xs:restriction base="xs:decimal">
+                    <xs:pattern value="[0-9]{3}"/>
+                </xs:restriction>
+            </xs:simpleType>""")
+
+        # Decoded values and errors have to be the same of the Decimal decoding
+        texts = ('1', '12', '-1.25', '0.1', '0', '0.05', '1.5', '12345', ' 0012 ', '012', 'INF')
+        for xsd_type in (self.xsd_types['decimal'], self.xsd_types['integer'],
+                         schema.types['price'], schema.types['positivePrice'], schema.types['code']):
+            for text in texts:
+                expected, expected_errors = xsd_type.decode(text, validation='lax')
+                for decimal_type in (float, int, str):
+                    value, errors = xsd_type.decode(text, validation='lax', decimal_type=decimal_type)
+                    self.assertEqual(len(errors), len(expected_errors))
+                    if expected is None:
+                        self.assertIsNone(value)
+                    else:
+                        self.assertEqual(float(value), float(expected))
+
+        # Integer texts are decoded to the requested type, when valid
+        self.assertEqual(self.xsd_types['decimal'].decode('7', decimal_type=int), 7)
+        self.assertIsInstance(self.xsd_types['decimal'].decode('7', decimal_type=int), int)
+        self.assertIsInstance(self.xsd_types['decimal'].decode('-1.25', decimal_type=float), float)
+        self.assertIsInstance(schema.types['positivePrice'].decode('12', decimal_type=float), float)
+        self.assertEqual(schema.types['code'].decode('012', decimal_type=float), 12.0)
+
+        # Values that have to be checked against facets are decoded to Decimal
+        self.assertEqual(schema.types['price'].decode('1.5', decimal_type=float), Decimal('1.5'))
+        self.assertIsInstance(schema.types['price'].decode('1.5', decimal_type=float), Decimal)
+        self.assertIsInstance(self.xsd_types['decimal'].decode('1.25', decimal_type=int), Decimal)
+        self.assertIsInstance(self.xsd_types['decimal'].decode('1.25', decimal_type=str), Decimal)
+        for text in ('0', '12345'):
+            with self.assertRaises(XMLSchemaValidationError):
+                schema.types['positivePrice'].decode(text, decimal_type=float)
+
 
 class TestXsd11SimpleTypes(TestXsdSimpleTypes):
 
@@ -15,7 +15,7 @@ from .exceptions import XMLSchemaValidatorError, XMLSchemaParseError, \
     XMLSchemaModelError, XMLSchemaModelDepthError, XMLSchemaValidationError, \
     XMLSchemaDecodeError, XMLSchemaEncodeError, XMLSchemaNotBuiltError, \
     XMLSchemaChildrenValidationError, XMLSchemaIncludeWarning, \
-    XMLSchemaImportWarning, XMLSchemaTypeTableWarning
+    XMLSchemaImportWarning, XMLSchemaTypeTableWarning, ValidationErrorSummary
 
 from .xsdbase import XsdValidator, XsdComponent, XsdAnnotation, XsdType, ValidationMixin, ParticleMixin
 
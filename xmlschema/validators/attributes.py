@@ -20,11 +20,11 @@ from ..exceptions import XMLSchemaAttributeError, XMLSchemaTypeError, XMLSchemaV
 from ..qnames import XSD_ANNOTATION, XSD_ANY_SIMPLE_TYPE, XSD_SIMPLE_TYPE, \
     XSD_ATTRIBUTE_GROUP, XSD_COMPLEX_TYPE, XSD_RESTRICTION, XSD_EXTENSION, \
     XSD_SEQUENCE, XSD_ALL, XSD_CHOICE, XSD_ATTRIBUTE, XSD_ANY_ATTRIBUTE
-from ..helpers import get_namespace, get_qname, get_xsd_form_attribute
+from ..helpers import get_namespace, get_qname, get_xsd_form_attribute, is_cacheable_value
 from ..namespaces import XSI_NAMESPACE
 
 from .exceptions import XMLSchemaValidationError
-from .xsdbase import XsdComponent, ValidationMixin
+from .xsdbase import XsdComponent, ValidationMixin, DecodeContext
 from .simple_types import XsdSimpleType
 from .wildcards import XsdAnyAttribute
 
@@ -70,6 +70,7 @@ class XsdAttribute(XsdComponent, ValidationMixin):
         if name == "type":
             if not isinstance(value, XsdSimpleType):
                 raise XMLSchemaTypeError("An XSD attribute's type must be a simpleType.")
+            self._decoded_values = {}
         super(XsdAttribute, self).__setattr__(name, value)
 
     def _parse(self):
@@ -222,35 +223,71 @@ class XsdAttribute(XsdComponent, ValidationMixin):
             return result
         return text
 
-    def iter_decode(self, text, validation='lax', **kwargs):
-        if not text and self.default is not None:
-            text = self.default
+    def get_decoded_value(self, text):
+        """
+        Returns the value of a fixed or default text decoded by the attribute's type
+        with the *skip* validation mode. The value is cached for the next calls.
+        """
+        key = (text, None, 'skip')
+        try:
+            return self._decoded_values[key]
+        except KeyError:
+            value = self._decoded_values[key] = self.type.text_decode(text)
+            return value
 
-        if self.fixed is not None:
+    def iter_decode(self, text, validation='lax', **kwargs):
+        errors = []
+        result = self._raw_decode(text, DecodeContext(validation, None, kwargs), errors)
+        for error in errors:
+            yield error
+        yield result
+
+    def _raw_decode(self, text, context, errors):
+        validation = context.validation
+        kwargs = context.kwargs
+        fixed, default = self.fixed, self.default
+        if not text and default is not None:
+            text = default
+
+        if fixed is not None:
             if text is None:
-                text = self.fixed
-            elif text == self.fixed or validation == 'skip':
+                text = fixed
+            elif text == fixed or validation == 'skip':
                 pass
-            elif self.type.text_decode(text) != self.type.text_decode(self.fixed):
-                yield self.validation_error(validation, "value differs from fixed value", text, **kwargs)
+            elif self.type.text_decode(text) != self.get_decoded_value(fixed):
+                reason = "value differs from fixed value"
+                errors.append(self.validation_error(validation, reason, text, context.source, context.namespaces))
+
+        if text is not None and (text == fixed or text == default):
+            # Immutable decoded values of predefined texts are cached if decoded without errors.
+            # Values decoded with the skip mode are not validated, so they have their own keys.
+            key = (text, kwargs.get('decimal_type'), 'skip' if validation == 'skip' else None)
+            try:
+                result = self._decoded_values[key]
+            except KeyError:
+                count = len(errors)
+                result = self.type._raw_decode(text, context, errors)
+                if count == len(errors) and is_cacheable_value(result) and not self.type.is_key():
+                    self._decoded_values[key] = result
+        else:
+            result = self.type._raw_decode(text, context, errors)
+        return self._convert_value(result, text, kwargs)
 
-        for result in self.type.iter_decode(text, validation, **kwargs):
-            if isinstance(result, XMLSchemaValidationError):
-                yield result
-            elif isinstance(result, Decimal):
-                try:
-                    yield kwargs['decimal_type'](result)
-                except (KeyError, TypeError):
-                    yield result
-                break
-            elif isinstance(result, (AbstractDateTime, Duration)):
-                try:
-                    yield result if kwargs['datetime_types'] is True else text
-                except KeyError:
-                    yield text
-            else:
-                yield result
-                break
+    @staticmethod
+    def _convert_value(value, text, kwargs):
+        """Applies the decimal and datetime options of a decoding to a value decoded from text."""
+        if isinstance(value, Decimal):
+            try:
+                return kwargs['decimal_type'](value)
+            except (KeyError, TypeError):
+                return value
+        elif isinstance(value, (AbstractDateTime, Duration)):
+            try:
+                return value if kwargs['datetime_types'] is True else text
+            except KeyError:
+                return text
+        else:
+            return value
 
     def iter_encode(self, obj, validation='lax', **kwargs):
         for result in self.type.iter_encode(obj, validation):
@@ -313,6 +350,7 @@ class XsdAttributeGroup(MutableMapping, XsdComponent, ValidationMixin):
         XSD_ATTRIBUTE_GROUP, XSD_COMPLEX_TYPE, XSD_RESTRICTION, XSD_EXTENSION,
         XSD_SEQUENCE, XSD_ALL, XSD_CHOICE, XSD_ATTRIBUTE, XSD_ANY_ATTRIBUTE
     }
+    _decode_plan = None
 
     def __init__(self, elem, schema, parent, derivation=None, base_attributes=None):
         self.derivation = derivation
@@ -351,9 +389,11 @@ class XsdAttributeGroup(MutableMapping, XsdComponent, ValidationMixin):
                 raise XMLSchemaValueError("%r name and key %r mismatch." % (value.name, key))
 
             self._attribute_group[key] = value
+        self._decode_plan = None
 
     def __delitem__(self, key):
         del self._attribute_group[key]
+        self._decode_plan = None
 
     def __iter__(self):
         if None in self._attribute_group:
@@ -369,6 +409,7 @@ class XsdAttributeGroup(MutableMapping, XsdComponent, ValidationMixin):
     def __setattr__(self, name, value):
         super(XsdAttributeGroup, self).__setattr__(name, value)
         if name == '_attribute_group':
+            self._decode_plan = None
             assert isinstance(value, dict), 'A dictionary object is required.'
             for k, v in value.items():
                 if k is None:
@@ -563,62 +604,139 @@ class XsdAttributeGroup(MutableMapping, XsdComponent, ValidationMixin):
                     for obj in attr.iter_components(xsd_classes):
                         yield obj
 
+    def get_decode_plan(self):
+        """
+        Returns the decode plan of the attribute group, a tuple with the set of the names
+        of the required attributes, the predefined (fixed or default) values, the fixed
+        values and the wildcard. Predefined values are tuples with the name, the text and
+        the value decoded from the text, or `None` if the text has to be decoded on each
+        use. The plan is computed once and reset when the group changes.
+        """
+        if self._decode_plan is None:
+            required = []
+            predefined = []
+            fixed_values = []
+            for k, v in self._attribute_group.items():
+                if k is None:
+                    continue
+                elif v.use == 'required':
+                    required.append(k)
+
+                text = v.fixed if v.fixed is not None else v.default
+                if text is None:
+                    continue
+
+                errors = []
+                value = v.type.raw_decode(text, 'lax', errors)
+                if errors or not is_cacheable_value(value) or v.type.is_key():
+                    value = None
+
+                predefined.append((k, text, value))
+                if v.fixed is not None:
+                    fixed_values.append((k, text, value))
+
+            self._decode_plan = (
+                frozenset(required), tuple(predefined), tuple(fixed_values), self._attribute_group.get(None)
+            )
+        return self._decode_plan
+
     def iter_decode(self, attrs, validation='lax', **kwargs):
+        for result in self._iter_decode(attrs, DecodeContext(validation, None, kwargs)):
+            yield result
+
+    def _iter_decode(self, attrs, context):
+        """
+        Decodes the attributes of an Element, sharing the context of a decoding run.
+
+        :param attrs: the attributes of the Element.
+        :param context: the :class:`DecodeContext` of the decoding run.
+        """
         if not attrs and not self:
             return
 
-        if validation != 'skip':
-            for k in filter(lambda x: x not in attrs, self.iter_required()):
+        validation = context.validation
+        kwargs = context.kwargs
+        required, predefined, fixed_values, wildcard = self.get_decode_plan()
+        if validation != 'skip' and required:
+            for k in sorted(required.difference(attrs)):
                 reason = "missing required attribute: %r" % k
-                yield self.validation_error(validation, reason, attrs, **kwargs)
+                yield self.validation_error(validation, reason, attrs, context.source, context.namespaces)
 
-        use_defaults = kwargs.get('use_defaults', True)
-        additional_attrs = [(k, v) for k, v in self.iter_predefined(use_defaults) if k not in attrs]
-        if additional_attrs:
-            attrs = {k: v for k, v in attrs.items()}
-            attrs.update(additional_attrs)
+        if not kwargs.get('use_defaults', True):
+            predefined = fixed_values
 
-        filler = kwargs.get('filler')
+        attribute_group = self._attribute_group
+        filler = context.filler
         result_list = []
+        errors = []
         for name, value in attrs.items():
-            try:
-                xsd_attribute = self[name]
-            except KeyError:
+            xsd_attribute = attribute_group.get(name)
+            if xsd_attribute is None:
                 if get_namespace(name) == XSI_NAMESPACE:
                     try:
                         xsd_attribute = self.maps.lookup_attribute(name)
                     except LookupError:
                         if validation != 'skip':
                             reason = "%r is not an attribute of the XSI namespace." % name
-                            yield self.validation_error(validation, reason, attrs, **kwargs)
+                            yield self.validation_error(validation, reason, attrs, context.source, context.namespaces)
                         continue
+                elif wildcard is not None:
+                    for result in wildcard.iter_decode((name, value), validation, **kwargs):
+                        if isinstance(result, XMLSchemaValidationError):
+                            yield result
+                        elif result is None and filler is not None:
+                            result_list.append((name, filler(wildcard)))
+                            break
+                        else:
+                            result_list.append((name, result))
+                            break
+                    continue
                 else:
-                    try:
-                        xsd_attribute = self[None]  # None key ==> anyAttribute
-                        value = (name, value)
-                    except KeyError:
-                        if validation != 'skip':
-                            reason = "%r attribute not allowed for element." % name
-                            yield self.validation_error(validation, reason, attrs, **kwargs)
-                        continue
+                    if validation != 'skip':
+                        reason = "%r attribute not allowed for element." % name
+                        yield self.validation_error(validation, reason, attrs, context.source, context.namespaces)
+                    continue
 
-            for result in xsd_attribute.iter_decode(value, validation, **kwargs):
-                if isinstance(result, XMLSchemaValidationError):
-                    yield result
-                elif result is None and filler is not None:
-                    result_list.append((name, filler(xsd_attribute)))
-                    break
-                else:
-                    result_list.append((name, result))
-                    break
+            result = xsd_attribute._raw_decode(value, context, errors)
+            if errors:
+                for error in errors:
+                    yield error
+                del errors[:]
+
+            if result is None and filler is not None:
+                result_list.append((name, filler(xsd_attribute)))
+            else:
+                result_list.append((name, result))
+
+        for name, text, value in predefined:
+            if name in attrs:
+                continue
+
+            xsd_attribute = attribute_group[name]
+            if value is not None:
+                result_list.append((name, xsd_attribute._convert_value(value, text, kwargs)))
+                continue
+
+            result = xsd_attribute._raw_decode(text, context, errors)
+            if errors:
+                for error in errors:
+                    yield error
+                del errors[:]
+
+            if result is None and filler is not None:
+                result_list.append((name, filler(xsd_attribute)))
+            else:
+                result_list.append((name, result))
 
-        if kwargs.get('fill_missing') is True:
+        if context.fill_missing is True:
+            names = set(attrs)
+            names.update(k for k, _, _ in predefined)
             if filler is None:
-                result_list.extend((k, None) for k in self._attribute_group
-                                   if k is not None and k not in attrs)
+                result_list.extend((k, None) for k in attribute_group
+                                   if k is not None and k not in names)
             else:
-                result_list.extend((k, filler(v)) for k, v in self._attribute_group.items()
-                                   if k is not None and k not in attrs)
+                result_list.extend((k, filler(v)) for k, v in attribute_group.items()
+                                   if k is not None and k not in names)
 
         yield result_list
 
@@ -14,30 +14,55 @@ This module contains classes for XML Schema elements, complex types and model gr
 from __future__ import unicode_literals
 import warnings
 from decimal import Decimal
+from itertools import chain
+from xml.sax.saxutils import escape
 from elementpath import XPath2Parser, ElementPathError, XPathContext
 from elementpath.datatypes import AbstractDateTime, Duration
 
+from ..compat import unicode_type
 from ..exceptions import XMLSchemaAttributeError
 from ..qnames import XSD_ANNOTATION, XSD_GROUP, \
     XSD_SEQUENCE, XSD_ALL, XSD_CHOICE, XSD_ATTRIBUTE_GROUP, XSD_COMPLEX_TYPE, \
     XSD_SIMPLE_TYPE, XSD_ALTERNATIVE, XSD_ELEMENT, XSD_ANY_TYPE, XSD_UNIQUE, \
     XSD_KEY, XSD_KEYREF, XSI_NIL, XSI_TYPE, XSD_ID, XSD_ERROR
-from ..helpers import get_qname, get_xsd_derivation_attribute, \
+from ..helpers import get_qname, get_xsd_derivation_attribute, is_cacheable_value, \
     get_xsd_form_attribute, ParticleCounter
-from ..etree import etree_element
+from ..etree import etree_element, etree_serialize, etree_namespace_declarations
 from ..converters import ElementData, raw_xml_encode, XMLSchemaConverter
 from ..xpath import XMLSchemaProxy, ElementPathMixin
 
 from .exceptions import XMLSchemaValidationError, XMLSchemaTypeTableWarning
-from .xsdbase import XsdComponent, XsdType, ValidationMixin, ParticleMixin
-from .identities import XsdKeyref
+from .xsdbase import XsdComponent, XsdType, ValidationMixin, ParticleMixin, DecodeContext
 from .wildcards import XsdAnyElement
+from .models import ModelVisitor
 
 
 XSD_MODEL_GROUP_TAGS = {XSD_GROUP, XSD_SEQUENCE, XSD_ALL, XSD_CHOICE}
 XSD_ATTRIBUTE_GROUP_ELEMENT = etree_element(XSD_ATTRIBUTE_GROUP)
 
 
+class XsdElementTask(object):
+    """
+    A pending decoding of a child element, yielded by the content decoder of a
+    model group. The caller decodes the child and sends back the result.
+
+    :param xsd_element: the XSD element declaration that matches the child.
+    :param elem: the child Element.
+    :param level: the depth of the child in the tree structure.
+    """
+    __slots__ = ('xsd_element', 'elem', 'level')
+
+    def __init__(self, xsd_element, elem, level):
+        self.xsd_element = xsd_element
+        self.elem = elem
+        self.level = level
+
+    def __repr__(self):
+        return '%s(xsd_element=%r, elem=%r, level=%d)' % (
+            self.__class__.__name__, self.xsd_element, self.elem, self.level
+        )
+
+
 class XsdElement(XsdComponent, ValidationMixin, ParticleMixin, ElementPathMixin):
     """
     Class for XSD 1.0 *element* declarations.
@@ -93,6 +118,7 @@ class XsdElement(XsdComponent, ValidationMixin, ParticleMixin, ElementPathMixin)
     def __setattr__(self, name, value):
         if name == "type":
             assert value is None or isinstance(value, XsdType), "Wrong value %r for attribute 'type'." % value
+            self._decoded_values = {}
             if hasattr(value, 'attributes'):
                 self.attributes = value.attributes
             else:
@@ -433,6 +459,36 @@ class XsdElement(XsdComponent, ValidationMixin, ParticleMixin, ElementPathMixin)
             text = self.fixed if self.fixed is not None else self.default
         return self.type.text_decode(text)
 
+    def get_decoded_value(self, xsd_type, text):
+        """
+        Returns the value of a fixed or default text decoded by an XSD simple type with
+        the *skip* validation mode. The value is cached for the next calls.
+        """
+        key = (xsd_type, text, None, 'skip')
+        try:
+            return self._decoded_values[key]
+        except KeyError:
+            value = self._decoded_values[key] = xsd_type.text_decode(text)
+            return value
+
+    def raw_decode_value(self, xsd_type, text, context, errors):
+        """
+        Decodes a fixed or default text with an XSD simple type, with the options of the
+        :class:`DecodeContext` of a decoding run, appending the errors to a list. Valid
+        values that are immutable are cached, for each *decimal_type*, and returned from
+        the cache in the next calls. Values decoded with the *skip* validation mode are
+        not validated, so they are cached apart.
+        """
+        key = (xsd_type, text, context.decimal_type, 'skip' if context.validation == 'skip' else None)
+        try:
+            return self._decoded_values[key]
+        except KeyError:
+            count = len(errors)
+            result = xsd_type._raw_decode(text, context, errors)
+            if count == len(errors) and is_cacheable_value(result) and not xsd_type.is_key():
+                self._decoded_values[key] = result
+            return result
+
     def iter_decode(self, elem, validation='lax', converter=None, level=0, **kwargs):
         """
         Creates an iterator for decoding an Element instance.
@@ -447,6 +503,38 @@ class XsdElement(XsdComponent, ValidationMixin, ParticleMixin, ElementPathMixin)
         """
         if not isinstance(converter, XMLSchemaConverter):
             converter = self.schema.get_converter(converter, level=level, **kwargs)
+
+        # The descendants are decoded using an explicit stack of decoders, so the
+        # nesting of the generators doesn't increase with the depth of the tree.
+        context = DecodeContext(validation, converter, kwargs)
+        stack = []
+        decoder = self._iter_decode(elem, context, level)
+        value = decoded = None
+        while True:
+            try:
+                result = decoder.send(value)
+            except StopIteration:
+                if not stack:
+                    break
+                decoder = stack.pop()
+                value = decoded  # resumes the parent's model group with the child's data
+                decoded = None
+                continue
+
+            value = None
+            if isinstance(result, XsdElementTask):
+                stack.append(decoder)
+                decoder = result.xsd_element._iter_decode(result.elem, context, result.level)
+                decoded = None  # a child that yields only errors has no data
+            elif not stack or isinstance(result, XMLSchemaValidationError):
+                yield result
+            else:
+                decoded = result
+
+    def _iter_decode(self, elem, context, level):
+        validation = context.validation
+        converter = context.converter
+        source, namespaces = context.source, context.namespaces
         value = content = attributes = None
 
         # Get the instance type: xsi:type or the schema's declaration
@@ -457,87 +545,97 @@ class XsdElement(XsdComponent, ValidationMixin, ParticleMixin, ElementPathMixin)
             try:
                 xsd_type = self.maps.lookup_type(converter.unmap_qname(xsi_type))
             except KeyError:
-                yield self.validation_error(validation, "unknown type %r" % xsi_type, elem, **kwargs)
+                yield self.validation_error(validation, "unknown type %r" % xsi_type, elem, source, namespaces)
                 xsd_type = self.get_type(elem)
 
         # Decode attributes
         attribute_group = getattr(xsd_type, 'attributes', self.attributes)
-        for result in attribute_group.iter_decode(elem.attrib, validation, **kwargs):
+        for result in attribute_group._iter_decode(elem.attrib, context):
             if isinstance(result, XMLSchemaValidationError):
-                yield self.validation_error(validation, result, elem, **kwargs)
+                yield self.validation_error(validation, result, elem, source, namespaces)
             else:
                 attributes = result
 
         # Checks the xsi:nil attribute of the instance
         if validation != 'skip' and XSI_NIL in elem.attrib:
             if not self.nillable:
-                yield self.validation_error(validation, "element is not nillable.", elem, **kwargs)
+                yield self.validation_error(validation, "element is not nillable.", elem, source, namespaces)
             try:
                 if elem.attrib[XSI_NIL].strip() in ('true', '1'):
                     if elem.text is not None:
                         reason = "xsi:nil='true' but the element is not empty."
-                        yield self.validation_error(validation, reason, elem, **kwargs)
+                        yield self.validation_error(validation, reason, elem, source, namespaces)
                     else:
                         element_data = ElementData(elem.tag, None, None, attributes)
                         yield converter.element_decode(element_data, self, level)
                         return
             except TypeError:
                 reason = "xsi:nil attribute must has a boolean value."
-                yield self.validation_error(validation, reason, elem, **kwargs)
+                yield self.validation_error(validation, reason, elem, source, namespaces)
 
         if not xsd_type.has_simple_content():
-            for result in xsd_type.content_type.iter_decode(
-                    elem, validation, converter, level + 1, **kwargs):
-                if isinstance(result, XMLSchemaValidationError):
-                    yield self.validation_error(validation, result, elem, **kwargs)
+            decoder = xsd_type.content_type._iter_decode(elem, context, level + 1)
+            result = None
+            while True:
+                try:
+                    result = decoder.send(result)
+                except StopIteration:
+                    break
+
+                if isinstance(result, XsdElementTask):
+                    result = yield result  # forwards the task to the main decoder
+                elif isinstance(result, XMLSchemaValidationError):
+                    yield self.validation_error(validation, result, elem, source, namespaces)
+                    result = None
                 else:
                     content = result
+                    result = None
         else:
             if len(elem) and validation != 'skip':
                 reason = "a simple content element can't has child elements."
-                yield self.validation_error(validation, reason, elem, **kwargs)
+                yield self.validation_error(validation, reason, elem, source, namespaces)
 
             text = elem.text
-            if self.fixed is not None:
+            fixed, default = self.fixed, self.default
+            if fixed is not None:
                 if text is None:
-                    text = self.fixed
-                elif text == self.fixed or validation == 'skip':
+                    text = fixed
+                elif text == fixed or validation == 'skip':
                     pass
-                elif xsd_type.text_decode(text) != xsd_type.text_decode(self.fixed):
-                    reason = "must has the fixed value %r." % self.fixed
-                    yield self.validation_error(validation, reason, elem, **kwargs)
+                elif xsd_type.text_decode(text) != self.get_decoded_value(xsd_type, fixed):
+                    reason = "must has the fixed value %r." % fixed
+                    yield self.validation_error(validation, reason, elem, source, namespaces)
 
-            elif not text and kwargs.get('use_defaults') and self.default is not None:
-                text = self.default
+            elif not text and context.use_defaults and default is not None:
+                text = default
 
             if not xsd_type.is_simple():
                 xsd_type = xsd_type.content_type
 
+            errors = []
             if text is None:
-                for result in xsd_type.iter_decode('', validation, **kwargs):
-                    if isinstance(result, XMLSchemaValidationError):
-                        yield self.validation_error(validation, result, elem, **kwargs)
-                        if 'filler' in kwargs:
-                            value = kwargs['filler'](self)
+                xsd_type._raw_decode('', context, errors)
+                if errors and context.filler is not None:
+                    value = context.filler(self)
             else:
-                for result in xsd_type.iter_decode(text, validation, **kwargs):
-                    if isinstance(result, XMLSchemaValidationError):
-                        yield self.validation_error(validation, result, elem, **kwargs)
-                    elif result is None and 'filler' in kwargs:
-                        value = kwargs['filler'](self)
-                    else:
-                        value = result
+                if text == fixed or text == default:
+                    value = self.raw_decode_value(xsd_type, text, context, errors)
+                else:
+                    value = xsd_type._raw_decode(text, context, errors)
+                if value is None and context.filler is not None:
+                    value = context.filler(self)
+
+            for error in errors:
+                yield self.validation_error(validation, error, elem, source, namespaces)
 
         if isinstance(value, Decimal):
-            try:
-                value = kwargs['decimal_type'](value)
-            except (KeyError, TypeError):
-                pass
+            if context.decimal_type is not None:
+                try:
+                    value = context.decimal_type(value)
+                except TypeError:
+                    pass
         elif isinstance(value, (AbstractDateTime, Duration)):
-            try:
-                if kwargs['datetime_types'] is not True:
-                    value = elem.text
-            except KeyError:
+            if context.datetime_types is not True:
                 value = elem.text
 
         element_data = ElementData(elem.tag, value, content, attributes)
@@ -545,12 +643,16 @@ class XsdElement(XsdComponent, ValidationMixin, ParticleMixin, ElementPathMixin)
         if content is not None:
             del content
 
-        if validation != 'skip':
-            for constraint in self.identities.values():
-                if isinstance(constraint, XsdKeyref) and '_no_deep' in kwargs:  # TODO: Complete lazy validation
-                    continue
-                for error in constraint(elem):
-                    yield self.validation_error(validation, error, elem, **kwargs)
+        if validation != 'skip' and self.identities and not context.no_depth:
+            # With no_depth the identities are checked incrementally by the caller
+            key_tables = {}
+            try:
+                for constraint in self.identities.values():
+                    for error in constraint(elem, key_tables):
+                        yield self.validation_error(validation, error, elem, source, namespaces)
+            finally:
+                for values in key_tables.values():
+                    values.close()
 
     def iter_encode(self, obj, validation='lax', converter=None, level=0, **kwargs):
         """
@@ -643,6 +745,80 @@ class XsdElement(XsdComponent, ValidationMixin, ParticleMixin, ElementPathMixin)
         yield elem
         del element_data
 
+    def iter_serialize(self, obj, validation='lax', converter=None, content=None, indent=4, **kwargs):
+        """
+        Creates an iterator for encoding data to XML text. For an element with complex
+        content the child elements are encoded and serialized one at a time, so the
+        encoded tree is never built in memory.
+
+        :param obj: the data that has to be encoded.
+        :param validation: the validation mode: can be 'lax', 'strict' or 'skip'.
+        :param converter: an :class:`XMLSchemaConverter` subclass or instance to use \
+        for the encoding.
+        :param content: an optional iterable of couples (name, value) with the data of \
+        further children, appended to the ones of *obj*. Can be a generator.
+        :param indent: number of spaces for XML indentation (default is 4).
+        :param kwargs: keyword arguments for the encoding process.
+        :return: yields chunks of XML text, interleaved with validation or encoding errors.
+        """
+        if not isinstance(converter, XMLSchemaConverter):
+            converter = self.schema.get_converter(converter, **kwargs)
+        element_data = converter.element_encode(obj, self, 0)
+        xsd_type = self.get_type(element_data)
+
+        xsi_attributes = element_data.attributes or ()
+        simple_encoding = xsd_type.has_simple_content() or XSI_TYPE in xsi_attributes or XSI_NIL in xsi_attributes
+        if simple_encoding or content is None and not element_data.content:
+            for result in self.iter_encode(obj, validation, converter, indent=indent, **kwargs):
+                yield result if isinstance(result, XMLSchemaValidationError) else etree_serialize(result)
+            return
+
+        errors = []
+        attributes = ()
+        for result in xsd_type.attributes.iter_encode(element_data.attributes, validation, **kwargs):
+            if isinstance(result, XMLSchemaValidationError):
+                errors.append(result)
+            else:
+                attributes = result
+
+        # The start and the end tags are taken from the serialization of an empty element
+        elem = converter.etree_element(element_data.tag, '\n', attrib=attributes)
+        start_tag, end_tag = etree_serialize(elem).rsplit('\n', 1)
+        declarations = etree_namespace_declarations(start_tag)  # not repeated by the children
+        for error in errors:
+            yield self.validation_error(validation, error, elem, **kwargs)
+        yield start_tag
+
+        group = xsd_type.content_type
+        model = ModelVisitor(group)
+        if isinstance(element_data.content, dict) or kwargs.get('unordered'):
+            children = model.iter_unordered_content(element_data.content)
+        elif converter.losslessly:
+            children = element_data.content or ()
+        else:
+            children = model.iter_collapsed_content(element_data.content or ())
+        if content is not None:
+            children = chain(children, content)
+
+        padding = '\n' + ' ' * indent
+        errors = []
+        for result in group.iter_encode_content(children, model, errors, validation,
+                                                converter, 1, indent, **kwargs):
+            if isinstance(result, tuple):
+                yield escape(unicode_type(result[1]))
+            elif isinstance(result, XMLSchemaValidationError):
+                yield result
+            else:
+                yield padding + etree_serialize(result, declarations)
+
+            for model_error in errors:
+                yield group.children_validation_error(validation, elem, *model_error, **kwargs)
+            del errors[:]
+
+        for model_error in errors:
+            yield group.children_validation_error(validation, elem, *model_error, **kwargs)
+        yield '\n' + end_tag
+
     def is_matching(self, name, default_namespace=None, group=None):
         if default_namespace and name[0] != '{':
             name = '{%s}%s' % (default_namespace, name)
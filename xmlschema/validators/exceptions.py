@@ -12,6 +12,7 @@
 This module contains exception and warning classes for the 'xmlschema.validators' subpackage.
 """
 from __future__ import unicode_literals
+import re
 
 from ..compat import PY3
 from ..exceptions import XMLSchemaException, XMLSchemaWarning, XMLSchemaValueError
@@ -34,12 +35,15 @@ class XMLSchemaValidatorError(XMLSchemaException):
     :type source: XMLResource
     :param namespaces: is an optional mapping from namespace prefix to URI.
     :type namespaces: dict
-    :ivar path: the XPath of the element, calculated when the element is set or the XML resource is set.
+    :ivar path: the XPath of the element, calculated on first access, or when the element \
+    or the XML resource is set if the resource is lazy.
     """
+    _path = None
+
     def __init__(self, validator, message, elem=None, source=None, namespaces=None):
         self.path = None
         self.validator = validator
-        self.message = message[:-1] if message[-1] in ('.', ':') else message
+        self.message = message[:-1] if message and message[-1] in ('.', ':') else message
         self.namespaces = namespaces
         self.source = source
         self.elem = elem
@@ -77,16 +81,27 @@ class XMLSchemaValidatorError(XMLSchemaException):
         if name == 'elem' and value is not None:
             if not is_etree_element(value):
                 raise XMLSchemaValueError("'elem' attribute requires an Element, not %r." % type(value))
-            if self.source is not None:
+            if self.source is not None and self.source.is_lazy():
+                # The elements of a lazy resource are cleared after processing, so
+                # the path is computed now and the element is not saved.
                 self.path = etree_getpath(value, self.root, self.namespaces, relative=False, add_position=True)
-                if self.source.is_lazy():
-                    value = None  # Don't save the element of a lazy resource
-        if name == 'source' and value is not None and getattr(self, 'elem', None) is not None:
+                value = None
+        if name == 'source' and value is not None and value.is_lazy() and \
+                getattr(self, 'elem', None) is not None:
             self.path = etree_getpath(self.elem, value.root, self.namespaces, relative=False, add_position=True)
-            if value.is_lazy():
-                self.elem = None
+            self.elem = None
         super(XMLSchemaValidatorError, self).__setattr__(name, value)
 
+    @property
+    def path(self):
+        if self._path is None and self.elem is not None and self.source is not None:
+            self._path = etree_getpath(self.elem, self.root, self.namespaces, relative=False, add_position=True)
+        return self._path
+
+    @path.setter
+    def path(self, value):
+        self._path = value
+
     @property
     def sourceline(self):
         return getattr(self.elem, 'sourceline', None)
@@ -197,17 +212,30 @@ class XMLSchemaValidationError(XMLSchemaValidatorError, ValueError):
     :param namespaces: is an optional mapping from namespace prefix to URI.
     :type namespaces: dict
     """
+    _message = None
+
     def __init__(self, validator, obj, reason=None, source=None, namespaces=None):
+        self.obj = obj
         super(XMLSchemaValidationError, self).__init__(
             validator=validator,
-            message="failed validating {!r} with {!r}".format(obj, validator),
+            message=None,
             elem=obj if is_etree_element(obj) else None,
             source=source,
             namespaces=namespaces,
         )
-        self.obj = obj
         self.reason = reason
 
+    @property
+    def message(self):
+        """The error message, formatted on first access."""
+        if self._message is None:
+            self._message = "failed validating {!r} with {!r}".format(self.obj, self.validator)
+        return self._message
+
+    @message.setter
+    def message(self, value):
+        self._message = value
+
     def __str__(self):
         # noinspection PyCompatibility,PyUnresolvedReferences
         return unicode(self).encode("utf-8")
@@ -249,8 +277,6 @@ class XMLSchemaDecodeError(XMLSchemaValidationError):
     :param namespaces: is an optional mapping from namespace prefix to URI.
     :type namespaces: dict
     """
-    message = "failed decoding {!r} with {!r}.\n"
-
     def __init__(self, validator, obj, decoder, reason=None, source=None, namespaces=None):
         super(XMLSchemaDecodeError, self).__init__(validator, obj, reason, source, namespaces)
         self.decoder = decoder
@@ -273,8 +299,6 @@ class XMLSchemaEncodeError(XMLSchemaValidationError):
     :param namespaces: is an optional mapping from namespace prefix to URI.
     :type namespaces: dict
     """
-    message = "failed encoding {!r} with {!r}.\n"
-
     def __init__(self, validator, obj, encoder, reason=None, source=None, namespaces=None):
         super(XMLSchemaEncodeError, self).__init__(validator, obj, reason, source, namespaces)
         self.encoder = encoder
@@ -343,6 +367,79 @@ class XMLSchemaChildrenValidationError(XMLSchemaValidationError):
         super(XMLSchemaChildrenValidationError, self).__init__(validator, elem, reason, source, namespaces)
 
 
+class ValidationErrorSummary(object):
+    """
+    An aggregating sink for validation errors. The errors are grouped by validator and
+    by reason template, the reason with quoted values, object reprs, hexadecimal and
+    decimal numbers replaced by '...'.
+    For each group are kept only the count and the first errors as samples, so the
+    memory used doesn't grow with the number of errors.
+
+    :param max_samples: the max number of sample errors kept for each group.
+    """
+    _template_sub = re.compile(
+        r"'[^']*'|\"[^\"]*\"|<[^<>]*>|\b0x[0-9a-fA-F]+\b|\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b"
+    ).sub
+
+    def __init__(self, max_samples=5):
+        self.max_samples = max_samples
+        self.groups = {}
+        self.total = 0
+
+    def __repr__(self):
+        return '%s(total=%r, groups=%r)' % (self.__class__.__name__, self.total, len(self.groups))
+
+    def __len__(self):
+        return len(self.groups)
+
+    def __iter__(self):
+        """Iterates the groups as 4-tuples (validator, reason template, count, samples)."""
+        for validator, template, count, samples in sorted(self.groups.values(), key=lambda x: -x[2]):
+            yield validator, template, count, samples
+
+    @classmethod
+    def get_template(cls, reason):
+        return cls._template_sub('...', reason) if reason else ''
+
+    def add(self, error):
+        """Adds an error to the summary."""
+        template = self.get_template(getattr(error, 'reason', None))
+        key = id(error.validator), template
+        self.total += 1
+        try:
+            group = self.groups[key]
+        except KeyError:
+            self.groups[key] = [error.validator, template, 1, [error]]
+        else:
+            group[2] += 1
+            if len(group[3]) < self.max_samples:
+                group[3].append(error)
+
+    def update(self, errors):
+        """
+        Adds the errors of an iterable, like the iterator returned by the method *iter_errors()*.
+
+        :return: the summary instance.
+        """
+        for error in errors:
+            self.add(error)
+        return self
+
+    def report(self):
+        """Returns a text report of the errors, starting from the most frequent ones."""
+        lines = ['%d validation errors in %d groups' % (self.total, len(self.groups))]
+        for validator, template, count, samples in self:
+            lines.append('\n%d errors with %r:' % (count, validator))
+            if template:
+                lines.append('  Reason: %s' % template)
+            for error in samples:
+                if error.sourceline is not None:
+                    lines.append('  Path: %s (line %r)' % (error.path, error.sourceline))
+                elif error.path is not None:
+                    lines.append('  Path: %s' % error.path)
+        return '\n'.join(lines)
+
+
 class XMLSchemaIncludeWarning(XMLSchemaWarning):
     """A schema include fails."""
 
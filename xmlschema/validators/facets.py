@@ -13,14 +13,15 @@ This module contains declarations and classes for XML Schema constraint facets.
 """
 from __future__ import unicode_literals
 import re
+from decimal import Decimal
 from elementpath import XPath2Parser, ElementPathError, datatypes
 
-from ..compat import unicode_type, MutableSequence
+from ..compat import string_base_type, unicode_type, long_type, MutableSequence
 from ..qnames import XSD_LENGTH, XSD_MIN_LENGTH, XSD_MAX_LENGTH, XSD_ENUMERATION, XSD_WHITE_SPACE, \
     XSD_PATTERN, XSD_MAX_INCLUSIVE, XSD_MAX_EXCLUSIVE, XSD_MIN_INCLUSIVE, XSD_MIN_EXCLUSIVE, \
     XSD_TOTAL_DIGITS, XSD_FRACTION_DIGITS, XSD_ASSERTION, XSD_EXPLICIT_TIMEZONE, XSD_NOTATION_TYPE, \
     XSD_BASE64_BINARY, XSD_HEX_BINARY
-from ..regex import get_python_regex
+from ..regex import compile_xsd_regex
 
 from .exceptions import XMLSchemaValidationError, XMLSchemaDecodeError
 from .xsdbase import XsdComponent
@@ -497,6 +498,9 @@ class XsdExplicitTimezoneFacet(XsdFacet):
 class XsdEnumerationFacets(MutableSequence, XsdFacet):
     """
     Sequence of XSD *enumeration* facets. Values are validates if match any of enumeration values.
+    The membership test is done with a set of the hashable enumeration values, falling back to
+    a scan of the enumeration list only for unhashable values or for values whose hash could
+    be inconsistent with equality (eg. date and time values with and without timezone).
 
     ..  <enumeration
           id = ID
@@ -507,6 +511,9 @@ class XsdEnumerationFacets(MutableSequence, XsdFacet):
     """
     _ADMITTED_TAGS = {XSD_ENUMERATION}
 
+    # Types of values for which a missing set membership is a definitive test
+    _hash_consistent_types = (string_base_type, bytes, int, long_type, float, Decimal)
+
     def __init__(self, elem, schema, parent, base_type):
         XsdFacet.__init__(self, elem, schema, parent, base_type)
 
@@ -514,6 +521,7 @@ class XsdEnumerationFacets(MutableSequence, XsdFacet):
         super(XsdFacet, self)._parse()
         self._elements = [self.elem]
         self.enumeration = [self._parse_value(self.elem)]
+        self._update_values()
 
     def _parse_value(self, elem):
         try:
@@ -534,6 +542,19 @@ class XsdEnumerationFacets(MutableSequence, XsdFacet):
                         self.parse_error(msg.format(value), elem)
             return value
 
+    def _update_values(self):
+        """Rebuilds the set of hashable enumeration values, used for membership tests."""
+        self._values = set()
+        self._has_unhashables = False
+        for value in self.enumeration:
+            self._add_value(value)
+
+    def _add_value(self, value):
+        try:
+            self._values.add(value)
+        except TypeError:
+            self._has_unhashables = True
+
     # Implements the abstract methods of MutableSequence
     def __getitem__(self, i):
         return self._elements[i]
@@ -541,17 +562,21 @@ class XsdEnumerationFacets(MutableSequence, XsdFacet):
     def __setitem__(self, i, elem):
         self._elements[i] = elem
         self.enumeration[i] = self._parse_value(elem)
+        self._update_values()
 
     def __delitem__(self, i):
         del self._elements[i]
         del self.enumeration[i]
+        self._update_values()
 
     def __len__(self):
         return len(self._elements)
 
     def insert(self, i, elem):
         self._elements.insert(i, elem)
-        self.enumeration.insert(i, self._parse_value(elem))
+        value = self._parse_value(elem)
+        self.enumeration.insert(i, value)
+        self._add_value(value)  # an insertion doesn't remove values, the set is only extended
 
     def __repr__(self):
         if len(self.enumeration) > 5:
@@ -561,8 +586,20 @@ class XsdEnumerationFacets(MutableSequence, XsdFacet):
         else:
             return '%s(%r)' % (self.__class__.__name__, self.enumeration)
 
+    def is_enumerated(self, value):
+        """Returns `True` if the value is equal to one of the enumeration values."""
+        try:
+            if value in self._values:
+                return True
+        except TypeError:
+            return value in self.enumeration  # an unhashable value (eg. a list)
+
+        if isinstance(value, self._hash_consistent_types) and not self._has_unhashables:
+            return False
+        return value in self.enumeration
+
     def __call__(self, value):
-        if value not in self.enumeration:
+        if not self.is_enumerated(value):
             yield XMLSchemaValidationError(
                 self, value, reason="invalid value %r, it must be one of %r" % (value, self.enumeration)
             )
@@ -571,6 +608,7 @@ class XsdEnumerationFacets(MutableSequence, XsdFacet):
 class XsdPatternFacets(MutableSequence, XsdFacet):
     """
     Sequence of XSD *pattern* facets. Values are validates if match any of patterns.
+    The patterns are merged into a single alternation regex used for validation.
 
     ..  <pattern
           id = ID
@@ -588,10 +626,11 @@ class XsdPatternFacets(MutableSequence, XsdFacet):
         super(XsdFacet, self)._parse()
         self._elements = [self.elem]
         self.patterns = [self._parse_value(self.elem)]
+        self._update_regex()
 
     def _parse_value(self, elem):
         try:
-            return re.compile(get_python_regex(elem.attrib['value'], self.xsd_version))
+            return compile_xsd_regex(elem.attrib['value'], self.xsd_version)
         except KeyError:
             self.parse_error("missing 'value' attribute", elem)
             return re.compile(r'^$')
@@ -599,6 +638,17 @@ class XsdPatternFacets(MutableSequence, XsdFacet):
             self.parse_error(err, elem)
             return re.compile(r'^$')
 
+    def _update_regex(self):
+        """Merges the patterns into a single regex, that is matched against the whole text."""
+        if len(self.patterns) == 1:
+            self.regex = self.patterns[0]
+        else:
+            self.regex = re.compile('|'.join(p.pattern for p in self.patterns))
+        try:
+            self._fullmatch = self.regex.fullmatch
+        except AttributeError:
+            self._fullmatch = self.regex.match  # Python 2.7: rely on anchored patterns
+
     # Implements the abstract methods of MutableSequence
     def __getitem__(self, i):
         return self._elements[i]
@@ -606,10 +656,12 @@ class XsdPatternFacets(MutableSequence, XsdFacet):
     def __setitem__(self, i, elem):
         self._elements[i] = elem
         self.patterns[i] = self._parse_value(elem)
+        self._update_regex()
 
     def __delitem__(self, i):
         del self._elements[i]
         del self.patterns[i]
+        self._update_regex()
 
     def __len__(self):
         return len(self._elements)
@@ -617,6 +669,7 @@ class XsdPatternFacets(MutableSequence, XsdFacet):
     def insert(self, i, elem):
         self._elements.insert(i, elem)
         self.patterns.insert(i, self._parse_value(elem))
+        self._update_regex()
 
     def __repr__(self):
         s = repr(self.regexps)
@@ -626,7 +679,7 @@ class XsdPatternFacets(MutableSequence, XsdFacet):
             return '%s(%s...\'])' % (self.__class__.__name__, s[:70])
 
     def __call__(self, text):
-        if all(pattern.match(text) is None for pattern in self.patterns):
+        if self._fullmatch(text) is None:
             msg = "value doesn't match any pattern of %r."
             yield XMLSchemaValidationError(self, text, reason=msg % self.regexps)
 
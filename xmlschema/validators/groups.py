@@ -21,8 +21,8 @@ from ..qnames import XSD_ANNOTATION, XSD_GROUP, XSD_SEQUENCE, XSD_ALL, XSD_CHOIC
 from xmlschema.helpers import get_qname, local_name
 
 from .exceptions import XMLSchemaValidationError, XMLSchemaChildrenValidationError
-from .xsdbase import ValidationMixin, XsdComponent, XsdType
-from .elements import XsdElement
+from .xsdbase import ValidationMixin, XsdComponent, XsdType, DecodeContext
+from .elements import XsdElement, XsdElementTask
 from .wildcards import XsdAnyElement, Xsd11AnyElement
 from .models import ParticleMixin, ModelGroup, ModelVisitor
 
@@ -502,9 +502,46 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
         :return: yields a list of 3-tuples (key, decoded data, decoder), \
         eventually preceded by a sequence of validation or decoding errors.
         """
+        try:
+            converter.get('')
+        except (AttributeError, TypeError):
+            converter = self.schema.get_converter(converter, level=level, **kwargs)
+
+        decoder = self._iter_decode(elem, DecodeContext(validation, converter, kwargs), level)
+        value = None
+        while True:
+            try:
+                result = decoder.send(value)
+            except StopIteration:
+                break
+
+            value = None
+            if not isinstance(result, XsdElementTask):
+                yield result
+                continue
+
+            for obj in result.xsd_element.iter_decode(
+                    result.elem, validation, converter=converter, level=result.level, **kwargs):
+                if isinstance(obj, XMLSchemaValidationError):
+                    yield obj
+                else:
+                    value = obj
+
+    def _iter_decode(self, elem, context, level):
+        """
+        Decodes the content of an Element, sharing the context of a decoding run.
+        The child elements matched by XSD elements are not decoded by the group
+        but yielded as :class:`XsdElementTask` instances, the caller has to send
+        back the decoded data of each task.
+
+        :param elem: the Element that has to be decoded.
+        :param context: the :class:`DecodeContext` of the decoding run.
+        :param level: the depth of the element in the tree structure.
+        """
         def not_whitespace(s):
             return s is not None and s.strip()
 
+        validation = context.validation
         result_list = []
         cdata_index = 1  # keys for CDATA sections are positive integers
 
@@ -515,7 +552,7 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
                     pass  # [XsdAnyElement()] equals to an empty complexType declaration
                 else:
                     reason = "character data between child elements not allowed!"
-                    yield self.validation_error(validation, reason, elem, **kwargs)
+                    yield self.validation_error(validation, reason, elem, context.source, context.namespaces)
                     cdata_index = 0  # Do not decode CDATA
 
         if cdata_index and elem.text is not None:
@@ -527,12 +564,12 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
         model = ModelVisitor(self)
         errors = []
 
-        try:
-            default_namespace = converter.get('')
-        except (AttributeError, TypeError):
-            converter = self.schema.get_converter(converter, level=level, **kwargs)
-            default_namespace = converter.get('')
+        # Fail-fast mode: the decoding stops at the first model error, without details
+        fail_fast = validation != 'skip' and context.max_errors == 1
+        if fail_fast:
+            model.expected_details = False
 
+        default_namespace = context.converter.get('')
         model_broken = False
         for index, child in enumerate(elem):
             if callable(child.tag):
@@ -571,16 +608,23 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
                             xsd_element = None
                             model_broken = True
 
-            if xsd_element is None or kwargs.get('no_depth'):
+            if fail_fast and errors:
+                break
+            elif xsd_element is None or context.no_depth:
                 # TODO: use a default decoder str-->str??
                 continue
 
-            for result in xsd_element.iter_decode(
-                    child, validation, converter=converter, level=level, **kwargs):
-                if isinstance(result, XMLSchemaValidationError):
-                    yield result
-                else:
-                    result_list.append((child.tag, result, xsd_element))
+            if isinstance(xsd_element, XsdElement):
+                # Child elements are decoded by the caller, that sends back the result
+                result = yield XsdElementTask(xsd_element, child, level)
+                result_list.append((child.tag, result, xsd_element))
+            else:
+                for result in xsd_element.iter_decode(
+                        child, validation, converter=context.converter, level=level, **context.kwargs):
+                    if isinstance(result, XMLSchemaValidationError):
+                        yield result
+                    else:
+                        result_list.append((child.tag, result, xsd_element))
 
             if cdata_index and child.tail is not None:
                 tail = unicode_type(child.tail.strip())
@@ -592,14 +636,16 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
                         result_list.append((cdata_index, tail, None))
                         cdata_index += 1
 
-        if model.element is not None:
+        if model.element is not None and not (fail_fast and errors):
             index = len(elem)
             for particle, occurs, expected in model.stop():
                 errors.append((index, particle, occurs, expected))
 
         if validation != 'skip' and errors:
             for model_error in errors:
-                yield self.children_validation_error(validation, elem, *model_error, **kwargs)
+                yield self.children_validation_error(
+                    validation, elem, *model_error, source=context.source, namespaces=context.namespaces
+                )
 
         yield result_list
 
@@ -628,13 +674,11 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
         padding = '\n' + ' ' * indent * level
 
         try:
-            default_namespace = converter.get('')
+            converter.get('')
         except (AttributeError, TypeError):
             converter = self.schema.get_converter(converter, level=level, **kwargs)
-            default_namespace = converter.get('')
 
         model = ModelVisitor(self)
-        cdata_index = 0
         if isinstance(element_data.content, dict) or kwargs.get('unordered'):
             content = model.iter_unordered_content(element_data.content)
         elif converter.losslessly:
@@ -642,14 +686,65 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
         else:
             content = model.iter_collapsed_content(element_data.content)
 
-        for index, (name, value) in enumerate(content):
-            if isinstance(name, int):
+        for result in self.iter_encode_content(content, model, errors, validation,
+                                               converter, level, indent, **kwargs):
+            if isinstance(result, tuple):
+                value = result[1]
                 if not children:
                     text = padding + value if text is None else text + value + padding
                 elif children[-1].tail is None:
                     children[-1].tail = padding + value
                 else:
                     children[-1].tail += value + padding
+            elif isinstance(result, XMLSchemaValidationError):
+                yield result
+            else:
+                children.append(result)
+
+        if children:
+            if children[-1].tail is None:
+                children[-1].tail = padding[:-indent] or '\n'
+            else:
+                children[-1].tail = children[-1].tail.strip() + (padding[:-indent] or '\n')
+
+        if validation != 'skip' and errors:
+            attrib = {k: unicode_type(v) for k, v in element_data.attributes.items()}
+            if validation == 'lax' and converter.etree_element_class is not etree_element:
+                child_tags = [converter.etree_element(e.tag, attrib=e.attrib) for e in children]
+                elem = converter.etree_element(element_data.tag, text, child_tags, attrib)
+            else:
+                elem = converter.etree_element(element_data.tag, text, children, attrib)
+
+            for index, particle, occurs, expected in errors:
+                yield self.children_validation_error(validation, elem, index, particle, occurs, expected, **kwargs)
+
+        yield text, children
+
+    def iter_encode_content(self, content, model, errors, validation='lax', converter=None,
+                            level=0, indent=4, **kwargs):
+        """
+        Creates an iterator for encoding a sequence of children data, matching the
+        children with the content model. The children are encoded one at a time, so
+        the content can be provided by a generator.
+
+        :param content: an iterable of couples (name, value), where the names are \
+        integers for character data parts.
+        :param model: the :class:`ModelVisitor` instance of the group.
+        :param errors: a list for collecting the content model errors, as 4-tuples \
+        (index, particle, occurs, expected).
+        :param validation: the validation mode: can be 'lax', 'strict' or 'skip'.
+        :param converter: an :class:`XMLSchemaConverter` instance to use for the encoding.
+        :param level: the depth of the children in the tree structure.
+        :param indent: number of spaces for XML indentation (default is 4).
+        :param kwargs: keyword arguments for the encoding process.
+        :return: yields the encoded child Elements, the couples of the character data \
+        parts unchanged and the validation errors of the children.
+        """
+        default_namespace = converter.get('')
+        index = cdata_index = 0
+        for index, (name, value) in enumerate(content, start=1):
+            if isinstance(name, int):
+                yield name, value
                 cdata_index += 1
                 continue
 
@@ -661,20 +756,20 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
                     xsd_element = model.element.match(name, default_namespace, self)
                     if xsd_element is None:
                         for particle, occurs, expected in model.advance():
-                            errors.append((index - cdata_index, particle, occurs, expected))
+                            errors.append((index - cdata_index - 1, particle, occurs, expected))
                         continue
                     elif isinstance(xsd_element, XsdAnyElement):
                         value = get_qname(default_namespace, name), value
 
                     for particle, occurs, expected in model.advance(True):
-                        errors.append((index - cdata_index, particle, occurs, expected))
+                        errors.append((index - cdata_index - 1, particle, occurs, expected))
                     break
                 else:
                     if self.suffix and self.suffix.is_matching(name, default_namespace, self):
                         xsd_element = self.suffix
                         value = get_qname(default_namespace, name), value
                     else:
-                        errors.append((index - cdata_index, self, 0, []))
+                        errors.append((index - cdata_index - 1, self, 0, []))
                         for xsd_element in self.iter_elements():
                             if not xsd_element.is_matching(name, default_namespace, self):
                                 continue
@@ -689,34 +784,11 @@ class XsdGroup(XsdComponent, ModelGroup, ValidationMixin):
 
             for result in xsd_element.iter_encode(
                     value, validation, converter=converter, level=level, indent=indent, **kwargs):
-                if isinstance(result, XMLSchemaValidationError):
-                    yield result
-                else:
-                    children.append(result)
+                yield result
 
         if model.element is not None:
-            index = len(element_data.content) - cdata_index
             for particle, occurs, expected in model.stop():
-                errors.append((index, particle, occurs, expected))
-
-        if children:
-            if children[-1].tail is None:
-                children[-1].tail = padding[:-indent] or '\n'
-            else:
-                children[-1].tail = children[-1].tail.strip() + (padding[:-indent] or '\n')
-
-        if validation != 'skip' and errors:
-            attrib = {k: unicode_type(v) for k, v in element_data.attributes.items()}
-            if validation == 'lax' and converter.etree_element_class is not etree_element:
-                child_tags = [converter.etree_element(e.tag, attrib=e.attrib) for e in children]
-                elem = converter.etree_element(element_data.tag, text, child_tags, attrib)
-            else:
-                elem = converter.etree_element(element_data.tag, text, children, attrib)
-
-            for index, particle, occurs, expected in errors:
-                yield self.children_validation_error(validation, elem, index, particle, occurs, expected, **kwargs)
-
-        yield text, children
+                errors.append((index - cdata_index, particle, occurs, expected))
 
 
 class Xsd11Group(XsdGroup):
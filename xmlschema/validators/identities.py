@@ -13,13 +13,21 @@ This module contains classes for other XML Schema identity constraints.
 """
 from __future__ import unicode_literals
 import re
+import pickle
 from collections import Counter
+from itertools import chain
 from elementpath import Selector, XPath1Parser, ElementPathError
 
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+from ..compat import MutableMapping
 from ..exceptions import XMLSchemaValueError
 from ..qnames import XSD_ANNOTATION, XSD_UNIQUE, XSD_KEY, XSD_KEYREF, XSD_SELECTOR, XSD_FIELD
 from ..helpers import get_qname, qname_to_prefixed
-from ..etree import etree_getpath
+from ..etree import etree_iterpath
 from ..regex import get_python_regex
 
 from .exceptions import XMLSchemaValidationError
@@ -43,9 +51,266 @@ class XsdIdentityXPathParser(XPath1Parser):
 XsdIdentityXPathParser.build_tokenizer()
 
 
+class KeyCounter(MutableMapping):
+    """
+    A counter for the key values of ID and identity constraints tables. Like a
+    `Counter` a missing key has a count of 0. The table is kept in memory until
+    it reaches the threshold size, then it's spilled to a temporary on-disk
+    SQLite database, so duplicates and references can be checked for documents
+    with a huge number of keys.
+
+    :param threshold: the max number of keys kept in memory, `None` for no limit.
+    """
+    def __init__(self, threshold=None):
+        self.threshold = threshold if sqlite3 is not None else None
+        self._counter = Counter()
+        self._db = None
+
+    def __repr__(self):
+        return '%s(threshold=%r, spilled=%r)' % (self.__class__.__name__, self.threshold, self.spilled)
+
+    @property
+    def spilled(self):
+        """`True` if the table is stored in the on-disk database."""
+        return self._db is not None
+
+    def _lookup(self, key):
+        # Keys are indexed by hash and compared after unpickling, so the equality
+        # between different types (eg. 1 and Decimal('1.0')) is preserved.
+        for rowid, data, count in self._db.execute(
+                "SELECT rowid, key, count FROM keys WHERE hash=?", (hash(key),)):
+            if pickle.loads(bytes(data)) == key:
+                return rowid, count
+        return None, 0
+
+    def _spill(self):
+        self._db = sqlite3.connect('')  # A temporary on-disk database
+        self._db.execute("CREATE TABLE keys (hash INTEGER, key BLOB, count INTEGER)")
+        self._db.execute("CREATE INDEX keys_hash ON keys (hash)")
+        self._db.executemany(
+            "INSERT INTO keys VALUES (?, ?, ?)",
+            ((hash(k), sqlite3.Binary(pickle.dumps(k, pickle.HIGHEST_PROTOCOL)), v)
+             for k, v in self._counter.items())
+        )
+        self._counter.clear()
+
+    def __getitem__(self, key):
+        if self._db is None:
+            return self._counter[key]
+        return self._lookup(key)[1]
+
+    def __setitem__(self, key, value):
+        if self._db is None:
+            self._counter[key] = value
+            if self.threshold is not None and len(self._counter) > self.threshold:
+                self._spill()
+            return
+
+        rowid = self._lookup(key)[0]
+        if rowid is not None:
+            self._db.execute("UPDATE keys SET count=? WHERE rowid=?", (value, rowid))
+        else:
+            self._db.execute("INSERT INTO keys VALUES (?, ?, ?)", (
+                hash(key), sqlite3.Binary(pickle.dumps(key, pickle.HIGHEST_PROTOCOL)), value
+            ))
+
+    def __delitem__(self, key):
+        if self._db is None:
+            del self._counter[key]
+            return
+
+        rowid = self._lookup(key)[0]
+        if rowid is None:
+            raise KeyError(key)
+        self._db.execute("DELETE FROM keys WHERE rowid=?", (rowid,))
+
+    def __contains__(self, key):
+        if self._db is None:
+            return key in self._counter
+        return self._lookup(key)[0] is not None
+
+    def __iter__(self):
+        for key, _ in self.items():
+            yield key
+
+    def __len__(self):
+        if self._db is None:
+            return len(self._counter)
+        return self._db.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+
+    def items(self):
+        if self._db is None:
+            for item in self._counter.items():
+                yield item
+        else:
+            for data, count in self._db.execute("SELECT key, count FROM keys"):
+                yield pickle.loads(bytes(data)), count
+
+    def clear(self):
+        self._counter.clear()
+        self.close()
+
+    def close(self):
+        """
+        Closes the on-disk database, removing its temporary file. The keys of a
+        spilled table are discarded, an in-memory table is left unchanged.
+        """
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class SimplePath(object):
+    """
+    A compiled simple XPath expression of a selector or a field. Calling the instance
+    with an instance element returns the list of the selected elements or attribute values.
+
+    :param descendants: the name test of a first descendant-or-self step, `False` if missing.
+    :param names: the name tests of the child steps.
+    :param attribute: the name of the attribute of the final step, `None` if missing.
+    """
+    __slots__ = ('descendants', 'names', 'attribute')
+
+    def __init__(self, descendants, names, attribute):
+        self.descendants = descendants
+        self.names = tuple(names)
+        self.attribute = attribute
+
+    def __getstate__(self):
+        return self.descendants, self.names, self.attribute
+
+    def __setstate__(self, state):
+        self.descendants, self.names, self.attribute = state
+
+    def __repr__(self):
+        return '%s(descendants=%r, names=%r, attribute=%r)' % (
+            self.__class__.__name__, self.descendants, self.names, self.attribute
+        )
+
+    def __call__(self, context):
+        descendants = self.descendants
+        if not descendants:
+            elements = [context]
+        elif descendants == '*':
+            elements = [e for e in context.iter() if not callable(e.tag)]
+        else:
+            elements = [e for e in context.iter() if e.tag == descendants]
+
+        for tag in self.names:
+            if tag == '*':
+                elements = [child for e in elements for child in e if not callable(child.tag)]
+            else:
+                elements = [child for e in elements for child in e if child.tag == tag]
+
+        attribute = self.attribute
+        if attribute is None:
+            return elements
+        return [e.attrib[attribute] for e in elements if attribute in e.attrib]
+
+    def iter_paths(self, context):
+        """
+        Iterates the selected elements together with their paths relative to the
+        context element, in document order. The steps are matched during a single
+        traversal, that doesn't descend into subtrees that cannot contain selected
+        elements, and the paths are built only for the selected elements.
+        """
+        descendants, names = self.descendants, self.names
+        last = len(names)
+
+        def match(name, elem):
+            return elem.tag == name or name == '*' and not callable(elem.tag)
+
+        # The states of an element are the numbers of the child steps matched by its paths
+        states = (0,) if not descendants or match(descendants, context) else ()
+        if last in states:
+            yield context, '.'
+
+        tags = []
+        stack = [(iter(context), states)]
+        while stack:
+            children, states = stack[-1]
+            for child in children:
+                if callable(child.tag):
+                    continue
+
+                child_states = tuple(k + 1 for k in states if k < last and match(names[k], child))
+                if descendants and match(descendants, child):
+                    child_states += (0,)
+                elif not child_states and not descendants:
+                    continue  # no selected elements in the subtree
+
+                tags.append(child.tag)
+                if last in child_states:
+                    yield child, '/'.join(chain(('.',), tags))
+                stack.append((iter(child), child_states))
+                break
+            else:
+                stack.pop()
+                if stack:
+                    tags.pop()
+
+
+def compile_simple_path(path, namespaces):
+    """
+    Compiles a simple XPath expression of a selector or a field to a callable that
+    selects directly from an instance element, without building an XPath context.
+    The simple subset is a sequence of child steps with names or '*', optionally
+    preceded by './/' and ended by an attribute step with a name.
+
+    :param path: the XPath expression of the selector or the field.
+    :param namespaces: the mapping from namespace prefix to URI.
+    :return: a :class:`SimplePath` instance, or `None` if the expression is not simple.
+    """
+    def resolve_name(name):
+        if ':' not in name:
+            return name
+        elif '::' in name:
+            return None
+        prefix, local_name = name.split(':')
+        if prefix == '*' or local_name == '*' or not namespaces.get(prefix):
+            return None
+        return '{%s}%s' % (namespaces[prefix], local_name)
+
+    path = path.replace(' ', '')
+    if '|' in path:
+        return
+    elif path.startswith('.//'):
+        descendants = True
+        path = path[3:]
+    else:
+        descendants = False
+
+    steps = path.split('/')
+    attribute = None
+    if steps[-1].startswith('@') or steps[-1].startswith('attribute::'):
+        step = steps.pop()
+        attribute = resolve_name(step[1:] if step.startswith('@') else step[11:])
+        if attribute is None or attribute == '*':
+            return
+
+    names = []
+    for step in steps:
+        if step.startswith('child::'):
+            step = step[7:]
+        if step == '.':
+            continue
+        name = resolve_name(step)
+        if not name or '@' in name:
+            return
+        names.append(name)
+
+    if descendants:
+        if not names:
+            return
+        descendants = names.pop(0)
+
+    return SimplePath(descendants, names, attribute)
+
+
 class XsdSelector(XsdComponent):
     """Class for defining an XPath selector for an XSD identity constraint."""
     _ADMITTED_TAGS = {XSD_SELECTOR}
+    accessor = None
     pattern = re.compile(get_python_regex(
         r"(\.//)?(((child::)?((\i\c*:)?(\i\c*|\*)))|\.)(/(((child::)?((\i\c*:)?(\i\c*|\*)))|\.))*(\|"
         r"(\.//)?(((child::)?((\i\c*:)?(\i\c*|\*)))|\.)(/(((child::)?((\i\c*:)?(\i\c*|\*)))|\.))*)*"
@@ -70,6 +335,9 @@ class XsdSelector(XsdComponent):
         except ElementPathError as err:
             self.parse_error(err)
             self.xpath_selector = Selector('*', self.namespaces, parser=XsdIdentityXPathParser)
+            self.accessor = None
+        else:
+            self.accessor = compile_simple_path(self.path, self.namespaces)
 
         # XSD 1.1 xpathDefaultNamespace attribute
         if self.schema.XSD_VERSION > '1.0':
@@ -85,6 +353,18 @@ class XsdSelector(XsdComponent):
     def built(self):
         return True
 
+    def select(self, context):
+        """
+        Selects from a context element, using the direct accessor for instance elements
+        if the XPath expression is simple.
+
+        :param context: an instance element or an XSD element.
+        :return: a list of elements or attribute values.
+        """
+        if self.accessor is None or isinstance(context, XsdComponent):
+            return self.xpath_selector.select(context)
+        return self.accessor(context)
+
 
 class XsdFieldSelector(XsdSelector):
     """Class for defining an XPath field selector for an XSD identity constraint."""
@@ -158,7 +438,7 @@ class XsdIdentity(XsdComponent):
         """
         fields = []
         for k, field in enumerate(self.fields):
-            result = field.xpath_selector.select(context)
+            result = field.select(context)
             if not result:
                 if not isinstance(self, XsdKey) or 'ref' in context.attrib and \
                         self.schema.meta_schema is None and self.schema.XSD_VERSION != '1.0':
@@ -178,23 +458,65 @@ class XsdIdentity(XsdComponent):
                 raise XMLSchemaValueError("%r field selects multiple values!" % field)
         return tuple(fields)
 
-    def iter_values(self, elem):
+    def get_xsd_fields(self, path):
+        """
+        Get the XSD fields decoders for a path relative to the XSD element that owns
+        the identity constraint. The results are memoized because they depend only
+        on the schema components.
+
+        :param path: a relative path of a selected instance element.
+        """
+        try:
+            return self._xsd_fields[path]
+        except AttributeError:
+            self._xsd_fields = {}
+        except KeyError:
+            pass
+
+        xsd_element = self.parent.find(path)
+        xsd_fields = self._xsd_fields[path] = self.get_fields(xsd_element)
+        return xsd_fields
+
+    def iter_selected(self, elem, include_context=True):
+        """
+        Iterate the elements selected by the selector together with their paths,
+        in document order. Simple selectors are matched step by step during the
+        traversal, the others are applied before computing the paths with a single
+        traversal of the instance subtree.
+
+        :param elem: Instance XML element.
+        :param include_context: if set to `False` the context element is not selected.
+        """
+        accessor = self.selector.accessor
+        if accessor is not None:
+            for e, path in accessor.iter_paths(elem):
+                if include_context or e is not elem:
+                    yield e, path
+            return
+
+        selected = set(self.selector.select(elem))
+        if not include_context:
+            selected.discard(elem)
+        if not selected:
+            return
+
+        for e, path in etree_iterpath(elem):
+            if e in selected:
+                yield e, path
+                selected.discard(e)
+                if not selected:
+                    break
+
+    def iter_values(self, elem, include_context=True):
         """
         Iterate field values, excluding empty values (tuples with all `None` values).
 
         :param elem: Instance XML element.
+        :param include_context: if set to `False` the context element is not selected.
         :return: N-Tuple with value fields.
         """
-        current_path = ''
-        xsd_fields = None
-        for e in self.selector.xpath_selector.iter_select(elem):
-            path = etree_getpath(e, elem)
-            if current_path != path:
-                # Change the XSD context only if the path is changed
-                current_path = path
-                xsd_element = self.parent.find(path)
-                xsd_fields = self.get_fields(xsd_element)
-
+        for e, path in self.iter_selected(elem, include_context):
+            xsd_fields = self.get_xsd_fields(path)
             if all(fld is None for fld in xsd_fields):
                 continue
 
@@ -214,14 +536,39 @@ class XsdIdentity(XsdComponent):
         for error in self.validator(*args, **kwargs):
             yield error
 
-    def validator(self, elem):
-        values = Counter()
-        for v in self.iter_values(elem):
-            if isinstance(v, XMLSchemaValidationError):
-                yield v
-            else:
-                values[v] += 1
+    def validator(self, elem, key_tables=None):
+        """
+        Validates the identity constraint on an instance element.
 
+        :param elem: Instance XML element.
+        :param key_tables: an optional dictionary for sharing the collected values \
+        of the identity constraint with the keyrefs checked on the same element.
+        """
+        values = KeyCounter(self.schema.key_store_threshold)
+        if key_tables is not None:
+            key_tables[self] = values  # closed by the caller
+
+        try:
+            for v in self.iter_values(elem):
+                if isinstance(v, XMLSchemaValidationError):
+                    yield v
+                else:
+                    values[v] += 1
+
+            for error in self.iter_table_errors(values, elem):
+                yield error
+        finally:
+            if key_tables is None:
+                values.close()
+
+    def iter_table_errors(self, values, elem, key_tables=None):
+        """
+        Checks the collected values of the identity constraint.
+
+        :param values: a Counter with the collected values.
+        :param elem: the instance element that is the scope of the identity constraint.
+        :param key_tables: unused, the values of a key/unique are checked against themselves.
+        """
         for value, count in values.items():
             if value and count > 1:
                 yield XMLSchemaValidationError(self, elem, reason="duplicated value {!r}.".format(value))
@@ -298,35 +645,137 @@ class XsdKeyref(XsdIdentity):
     def built(self):
         return bool(self.fields and self.selector and self.refer)
 
-    def get_refer_values(self, elem):
-        values = set()
+    def get_refer_values(self, elem, key_tables=None):
+        """
+        Get the values of the referenced key/unique constraint. If the referenced
+        constraint is defined on the same element its values are taken from the
+        key tables already collected, if available.
+
+        :param elem: Instance XML element.
+        :param key_tables: an optional dictionary with the collected key values.
+        """
+        if key_tables and self.refer_path == '.' and self.refer in key_tables:
+            return key_tables[self.refer]
+
+        values = KeyCounter(self.schema.key_store_threshold)
         for e in elem.iterfind(self.refer_path):
             for v in self.refer.iter_values(e):
                 if not isinstance(v, XMLSchemaValidationError):
-                    values.add(v)
+                    values[v] += 1
         return values
 
-    def validator(self, elem):
+    def validator(self, elem, key_tables=None):
         if self.refer is None:
             return
 
         refer_values = None
-        for v in self.iter_values(elem):
-            if isinstance(v, XMLSchemaValidationError):
-                yield v
-                continue
+        try:
+            for v in self.iter_values(elem):
+                if isinstance(v, XMLSchemaValidationError):
+                    yield v
+                    continue
+
+                if refer_values is None:
+                    try:
+                        refer_values = self.get_refer_values(elem, key_tables)
+                    except XMLSchemaValueError as err:
+                        yield XMLSchemaValidationError(self, elem, str(err))
+                        continue
+
+                if v not in refer_values:
+                    yield self.missing_key_error(v, elem)
+        finally:
+            if refer_values is not None and not (key_tables and refer_values is key_tables.get(self.refer)):
+                refer_values.close()
+
+    def missing_key_error(self, value, elem):
+        reason = "Key {!r} with value {!r} not found for identity constraint of element {!r}." \
+            .format(self.prefixed_name, value, qname_to_prefixed(elem.tag, self.namespaces))
+        return XMLSchemaValidationError(validator=self, obj=elem, reason=reason)
+
+    def iter_table_errors(self, values, elem, key_tables=None):
+        if self.refer is None:
+            return
+
+        try:
+            refer_values = key_tables[self.refer]
+        except (KeyError, TypeError):
+            refer_values = ()
+
+        for value, count in values.items():
+            if value not in refer_values:
+                for _ in range(count):
+                    yield self.missing_key_error(value, elem)
+
 
-            if refer_values is None:
+class IdentityScope(object):
+    """
+    Incremental validation of the identity constraints of an XSD element, for
+    instance elements whose children are processed one at a time, like the root
+    of a lazy XML resource. Only the tables of the collected values are kept in
+    memory, the checks are completed when the scope is closed.
+
+    :param xsd_element: the XSD element that owns the identity constraints.
+    :param elem: the instance element that is the scope of the identity constraints.
+    """
+    def __init__(self, xsd_element, elem):
+        self.elem = elem
+        threshold = xsd_element.schema.key_store_threshold
+        self.constraints = [c for c in xsd_element.identities.values() if c.built]
+        self.key_tables = {c: KeyCounter(threshold) for c in self.constraints}
+        self.refer_tables = {
+            c: KeyCounter(threshold) for c in self.constraints
+            if isinstance(c, XsdKeyref) and c.refer is not None and c.refer_path != '.'
+        }
+
+    def __repr__(self):
+        return '%s(elem=%r)' % (self.__class__.__name__, self.elem)
+
+    def iter_errors(self, child=None):
+        """
+        Updates the key tables with the values selected in a child subtree, or with
+        the values of the scope element itself if no child is provided.
+
+        :param child: a child of the scope element.
+        """
+        context = self.elem.makeelement(self.elem.tag, self.elem.attrib)
+        if child is not None:
+            context.append(child)
+
+        for constraint in self.constraints:
+            values = self.key_tables[constraint]
+            for v in constraint.iter_values(context, include_context=child is None):
+                if isinstance(v, XMLSchemaValidationError):
+                    yield v
+                else:
+                    values[v] += 1
+
+            if child is not None and constraint in self.refer_tables:
                 try:
-                    refer_values = self.get_refer_values(elem)
+                    refer_values = constraint.get_refer_values(context)
                 except XMLSchemaValueError as err:
-                    yield XMLSchemaValidationError(self, elem, str(err))
-                    continue
+                    yield XMLSchemaValidationError(constraint, self.elem, str(err))
+                else:
+                    refer_table = self.refer_tables[constraint]
+                    for v, count in refer_values.items():
+                        refer_table[v] += count
+                    refer_values.clear()
+
+    def close(self):
+        """Completes the checks of the identity constraints and clears the key tables."""
+        for constraint in self.constraints:
+            if constraint in self.refer_tables:
+                key_tables = {constraint.refer: self.refer_tables[constraint]}
+            else:
+                key_tables = self.key_tables
+
+            for error in constraint.iter_table_errors(self.key_tables[constraint], self.elem, key_tables):
+                yield error
 
-            if v not in refer_values:
-                reason = "Key {!r} with value {!r} not found for identity constraint of element {!r}." \
-                    .format(self.prefixed_name, v, qname_to_prefixed(elem.tag, self.namespaces))
-                yield XMLSchemaValidationError(validator=self, obj=elem, reason=reason)
+        for table in chain(self.key_tables.values(), self.refer_tables.values()):
+            table.clear()
+        self.key_tables.clear()
+        self.refer_tables.clear()
 
 
 class Xsd11Unique(XsdUnique):
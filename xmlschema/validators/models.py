@@ -325,7 +325,11 @@ class ModelVisitor(MutableSequence):
     :ivar iterator: the current XSD group iterator.
     :ivar items: the current XSD group unmatched items.
     :ivar match: if the XSD group has an effective item match.
+    :ivar expected_details: if set to `False` the lists of expected elements are not \
+    built and the occurrence errors are yielded with `None` in place of them.
     """
+    expected_details = True
+
     def __init__(self, root):
         self.root = root
         self.occurs = Counter()
@@ -384,14 +388,18 @@ class ModelVisitor(MutableSequence):
         """
         Returns the expected elements of the current and descendant groups.
         """
-        expected = []
+        return list(self.iter_expected())
+
+    def iter_expected(self):
+        """Iterates the expected elements of the current and descendant groups."""
         for item in reversed(self.items):
             if isinstance(item, ModelGroup):
-                expected.extend(item.iter_elements())
+                for e in item.iter_elements():
+                    yield e
             else:
-                expected.append(item)
-                expected.extend(item.maps.substitution_groups.get(item.name, ()))
-        return expected
+                yield item
+                for e in item.maps.substitution_groups.get(item.name, ()):
+                    yield e
 
     def restart(self):
         self.clear()
@@ -473,8 +481,15 @@ class ModelVisitor(MutableSequence):
                     if not self.match:
                         if self.group.model == 'all' and all(e.min_occurs == 0 for e in self.items):
                             occurs[self.group] += 1
-                        group, expected = self.group, self.expected
-                        if stop_item(group) and expected:
+                        group = self.group
+                        if self.expected_details:
+                            expected = self.expected
+                            has_expected = bool(expected)
+                        else:
+                            expected = None
+                            has_expected = any(True for _ in self.iter_expected())
+
+                        if stop_item(group) and has_expected:
                             yield group, occurs[group], expected
                     elif not self.items:
                         self.iterator, self.items, self.match = iter(self.group), self.group[::-1], False
@@ -496,7 +511,7 @@ class ModelVisitor(MutableSequence):
         except IndexError:
             self.element = None
             if self.group.is_missing(occurs[self.group]) and self.items:
-                yield self.group, occurs[self.group], self.expected
+                yield self.group, occurs[self.group], self.expected if self.expected_details else None
 
     def sort_content(self, content, restart=True):
         if restart:
@@ -16,7 +16,8 @@ XMLSchema11 for XSD 1.1. The latter class parses also XSD 1.0 schemas, as prescr
 the standard.
 """
 import os
-from collections import namedtuple, Counter
+from collections import namedtuple
+from itertools import islice
 from abc import ABCMeta
 import warnings
 import re
@@ -42,7 +43,8 @@ from .exceptions import XMLSchemaParseError, XMLSchemaValidationError, XMLSchema
     XMLSchemaNotBuiltError, XMLSchemaIncludeWarning, XMLSchemaImportWarning
 from .xsdbase import XSD_VALIDATION_MODES, XsdValidator, ValidationMixin, XsdComponent
 from .notations import XsdNotation
-from .identities import XsdKey, XsdKeyref, XsdUnique, Xsd11Key, Xsd11Unique, Xsd11Keyref
+from .identities import XsdKey, XsdKeyref, XsdUnique, Xsd11Key, Xsd11Unique, Xsd11Keyref, \
+    IdentityScope, KeyCounter
 from .simple_types import xsd_simple_type_factory, XsdUnion, XsdAtomicRestriction, \
     Xsd11AtomicRestriction, Xsd11Union
 from .attributes import XsdAttribute, XsdAttributeGroup, Xsd11Attribute
@@ -191,6 +193,14 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
     :vartype final_default: str
     :cvar default_attributes: the XSD 1.1 schema's *defaultAttributes* attribute, defaults to ``None``.
     :vartype default_attributes: XsdAttributeGroup
+    :cvar values_cache_size: the max number of decoded values cached by each simple type that \
+    has a small or enumerated value space. Set to 0 for disabling the cache of decoded values. \
+    The setting applies also to the builtin types, when the data is validated by the schema.
+    :vartype values_cache_size: int
+    :cvar key_store_threshold: the max number of key values of an ID map or of an identity \
+    constraint table that are kept in memory during a validation. Over this size the table \
+    is moved to a temporary on-disk database. Set to `None` for keeping the tables in memory.
+    :vartype key_store_threshold: int
 
     :ivar target_namespace: is the *targetNamespace* of the schema, the namespace to which \
     belong the declarations/definitions of the schema. If it's empty no namespace is associated \
@@ -245,6 +255,8 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
     block_default = ''
     final_default = ''
     redefine = None
+    values_cache_size = 1024
+    key_store_threshold = 1000000
 
     # Additional defaults for XSD 1.1
     default_attributes = None
@@ -1093,10 +1105,11 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
         Like :meth:`validate` except that do not raises an exception but returns ``True`` if
         the XML document is valid, ``False`` if it's invalid.
         """
-        error = next(self.iter_errors(source, path, schema_path, use_defaults, namespaces), None)
+        error = next(self.iter_errors(source, path, schema_path, use_defaults, namespaces, max_errors=1), None)
         return error is None
 
-    def iter_errors(self, source, path=None, schema_path=None, use_defaults=True, namespaces=None):
+    def iter_errors(self, source, path=None, schema_path=None, use_defaults=True, namespaces=None,
+                    max_errors=None):
         """
         Creates an iterator for the errors generated by the validation of an XML data
         against the XSD schema/component instance.
@@ -1110,7 +1123,19 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
         decoding. Useful if the root of the XML data doesn't match an XSD global element of the schema.
         :param use_defaults: Use schema's default values for filling missing data.
         :param namespaces: is an optional mapping from namespace prefix to URI.
+        :param max_errors: the maximum number of errors to report, the validation is stopped \
+        when this limit is reached. With `max_errors=1` the validation runs in fail-fast mode, \
+        skipping the rest of the content after the first error of a content model and without \
+        building the lists of expected elements.
         """
+        errors = self._iter_errors(source, path, schema_path, use_defaults, namespaces, max_errors)
+        if max_errors is not None:
+            errors = islice(errors, max_errors)
+
+        for error in errors:
+            yield error
+
+    def _iter_errors(self, source, path, schema_path, use_defaults, namespaces, max_errors):
         if not self.built:
             if self.meta_schema is not None:
                 raise XMLSchemaNotBuiltError(self, "schema %r is not built." % self)
@@ -1124,40 +1149,67 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
         namespaces = {} if namespaces is None else namespaces.copy()
         namespaces.update(source.get_namespaces())
 
-        id_map = Counter()
-
-        if source.is_lazy() and path is None:
-            # TODO: Document validation in lazy mode.
-            # Validation is done pushing a _no_deep argument for root node and with
-            # a path='*' for validating children. This is a feature under test.
-            xsd_element = self.get_element(source.root.tag, schema_path)
-            if xsd_element is None:
-                yield self.validation_error('lax', "%r is not an element of the schema" % source.root, source.root)
-
-            for result in xsd_element.iter_decode(source.root, source=source, namespaces=namespaces,
-                                                  use_defaults=use_defaults, id_map=id_map,
-                                                  no_depth=True, drop_results=True):
-                if isinstance(result, XMLSchemaValidationError):
-                    yield result
-                else:
-                    del result
-
-            path = '*'
-            if not schema_path:
-                schema_path = '/%s/*' % source.root.tag
-
-        for elem in source.iterfind(path, namespaces):
-            xsd_element = self.get_element(elem.tag, schema_path, namespaces)
-            if xsd_element is None:
-                yield self.validation_error('lax', "%r is not an element of the schema" % elem, elem)
-
-            for result in xsd_element.iter_decode(elem, source=source, namespaces=namespaces,
-                                                  use_defaults=use_defaults, id_map=id_map,
-                                                  drop_results=True):
-                if isinstance(result, XMLSchemaValidationError):
-                    yield result
-                else:
-                    del result
+        id_map = KeyCounter(self.key_store_threshold)
+        converter = self.get_converter(namespaces=namespaces)  # shared by all the decoders
+
+        try:
+            if source.is_lazy() and path is None:
+                # TODO: Document validation in lazy mode.
+                # Validation is done pushing a no_depth argument for root node and with
+                # a path='*' for validating children. This is a feature under test.
+                # The identity constraints of the root are checked incrementally,
+                # keeping only the tables of the collected values.
+                root = source.root
+                xsd_element = self.get_element(root.tag, schema_path)
+                if xsd_element is None:
+                    yield self.validation_error('lax', "%r is not an element of the schema" % root, root)
+
+                for result in xsd_element.iter_decode(root, converter=converter, source=source,
+                                                      namespaces=namespaces, use_defaults=use_defaults,
+                                                      id_map=id_map, no_depth=True, drop_results=True,
+                                                      values_cache_size=self.values_cache_size,
+                                                      max_errors=max_errors):
+                    if isinstance(result, XMLSchemaValidationError):
+                        yield result
+                    else:
+                        del result
+
+                xsd_root = xsd_element
+                identities = IdentityScope(xsd_root, root) if xsd_root.identities else None
+                if identities is not None:
+                    for error in identities.iter_errors():
+                        yield xsd_root.validation_error('lax', error, root, source, namespaces)
+
+                path = '*'
+                if not schema_path:
+                    schema_path = '/%s/*' % root.tag
+            else:
+                xsd_root = identities = None
+
+            for elem in source.iterfind(path, namespaces):
+                xsd_element = self.get_element(elem.tag, schema_path, namespaces)
+                if xsd_element is None:
+                    yield self.validation_error('lax', "%r is not an element of the schema" % elem, elem)
+
+                for result in xsd_element.iter_decode(elem, converter=converter, source=source,
+                                                      namespaces=namespaces, use_defaults=use_defaults,
+                                                      id_map=id_map, drop_results=True,
+                                                      values_cache_size=self.values_cache_size,
+                                                      max_errors=max_errors):
+                    if isinstance(result, XMLSchemaValidationError):
+                        yield result
+                    else:
+                        del result
+
+                if identities is not None:
+                    for error in identities.iter_errors(elem):
+                        yield xsd_root.validation_error('lax', error, source.root, source, namespaces)
+
+            if identities is not None:
+                for error in identities.close():
+                    yield xsd_root.validation_error('lax', error, source.root, source, namespaces)
+        finally:
+            id_map.close()
 
     def iter_decode(self, source, path=None, schema_path=None, validation='lax', process_namespaces=True,
                     namespaces=None, use_defaults=True, decimal_type=None, datetime_types=False,
@@ -1189,7 +1241,11 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
         an attribute declaration. If not provided undecodable data is replaced by `None`.
         :param fill_missing: if set to `True` the decoder fills also missing attributes. \
         The filling value is `None` or a typed value if the *filler* callback is provided.
-        :param kwargs: keyword arguments with other options for converter and decoder.
+        :param kwargs: keyword arguments with other options for converter and decoder. \
+        Provide *list_array=True* for decoding lists of numeric items to NumPy arrays. \
+        Provide *max_errors* for limiting the number of reported errors. In *strict* mode the \
+        decoding is stopped when the limit is reached, in *lax* mode the decoding is completed \
+        and the errors after the limit are discarded, so the decoded data is not truncated.
         :return: yields a decoded data object, eventually preceded by a sequence of validation \
         or decoding errors.
         """
@@ -1213,22 +1269,38 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
             namespaces = {}
 
         converter = self.get_converter(converter, namespaces, **kwargs)
-        id_map = Counter()
+        id_map = KeyCounter(self.key_store_threshold)
         if decimal_type is not None:
             kwargs['decimal_type'] = decimal_type
         if filler is not None:
             kwargs['filler'] = filler
+        kwargs.setdefault('values_cache_size', self.values_cache_size)
 
-        for elem in source.iterfind(path, namespaces):
-            xsd_element = self.get_element(elem.tag, schema_path, namespaces)
-            if xsd_element is None:
-                yield self.validation_error(validation, "%r is not an element of the schema" % elem, elem)
+        max_errors = kwargs.get('max_errors')
+        if validation == 'lax':
+            kwargs.pop('max_errors', None)  # the fail-fast mode would truncate the decoded data
+        errors = 0
+        try:
+            for elem in source.iterfind(path, namespaces):
+                xsd_element = self.get_element(elem.tag, schema_path, namespaces)
+                if xsd_element is None:
+                    yield self.validation_error(validation, "%r is not an element of the schema" % elem, elem)
+
+                for obj in xsd_element.iter_decode(
+                        elem, validation, converter=converter, source=source, namespaces=namespaces,
+                        use_defaults=use_defaults, datetime_types=datetime_types,
+                        fill_missing=fill_missing, id_map=id_map, **kwargs):
+                    if max_errors is None or not isinstance(obj, XMLSchemaValidationError):
+                        yield obj
+                        continue
 
-            for obj in xsd_element.iter_decode(
-                    elem, validation, converter=converter, source=source, namespaces=namespaces,
-                    use_defaults=use_defaults, datetime_types=datetime_types,
-                    fill_missing=fill_missing, id_map=id_map, **kwargs):
-                yield obj
+                    errors += 1
+                    if errors <= max_errors:
+                        yield obj
+                    if errors >= max_errors and validation != 'lax':
+                        return
+        finally:
+            id_map.close()
 
     def decode(self, source, path=None, schema_path=None, validation='strict', *args, **kwargs):
         """
@@ -1282,16 +1354,7 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
 
         namespaces = {} if namespaces is None else namespaces.copy()
         converter = self.get_converter(converter, namespaces, **kwargs)
-
-        if path is not None:
-            xsd_element = self.find(path, namespaces=namespaces)
-        elif isinstance(obj, dict) and len(obj) == 1:
-            xsd_element = self.elements.get(list(obj.keys())[0])
-        elif len(self.elements) == 1:
-            xsd_element = list(self.elements.values())[0]
-        else:
-            root_elements = self.root_elements
-            xsd_element = root_elements[0] if len(root_elements) == 1 else None
+        xsd_element = self._get_encoding_element(obj, path, namespaces)
 
         if not isinstance(xsd_element, XsdElement):
             if path is not None:
@@ -1304,6 +1367,61 @@ class XMLSchemaBase(XsdValidator, ValidationMixin, ElementPathMixin):
                                                   unordered=unordered, **kwargs):
                 yield result
 
+    def iter_serialize(self, obj, path=None, validation='lax', namespaces=None, converter=None,
+                       content=None, unordered=False, **kwargs):
+        """
+        Creates an iterator for encoding a data structure to XML text. The child elements
+        of the root are encoded and serialized one at a time, so with a *content* provided
+        by a generator the encoding can be written to a stream with a bounded memory usage.
+
+        :param obj: the data that has to be encoded to XML data.
+        :param path: is an optional XPath expression for selecting the element of the schema \
+        that matches the data that has to be encoded. For default the first global element of \
+        the schema is used.
+        :param validation: the XSD validation mode. Can be 'strict', 'lax' or 'skip'.
+        :param namespaces: is an optional mapping from namespace prefix to URI.
+        :param converter: an :class:`XMLSchemaConverter` subclass or instance to use for the encoding.
+        :param content: an optional iterable of couples (name, value) with the data of further \
+        children of the root element, encoded after the children included in *obj*.
+        :param unordered: a flag for explicitly activating unordered encoding mode for content model \
+        data. This mode uses content models for a reordered-by-model iteration of the child elements.
+        :param kwargs: Keyword arguments containing options for converter and encoding.
+        :return: yields chunks of XML text or validation/encoding errors.
+        """
+        if not self.built:
+            if self.meta_schema is not None:
+                raise XMLSchemaNotBuiltError(self, "schema %r is not built." % self)
+            self.build()
+
+        if validation not in XSD_VALIDATION_MODES:
+            raise XMLSchemaValueError("validation argument can be 'strict', 'lax' or 'skip': %r" % validation)
+
+        namespaces = {} if namespaces is None else namespaces.copy()
+        converter = self.get_converter(converter, namespaces, **kwargs)
+        xsd_element = self._get_encoding_element(obj, path, namespaces)
+
+        if not isinstance(xsd_element, XsdElement):
+            if path is not None:
+                msg = "the path %r doesn't match any element of the schema!" % path
+            else:
+                msg = "unable to select an element for encoding data, provide a valid 'path' argument."
+            yield XMLSchemaEncodeError(self, obj, self.elements, reason=msg)
+        else:
+            for result in xsd_element.iter_serialize(obj, validation, converter=converter, content=content,
+                                                     unordered=unordered, **kwargs):
+                yield result
+
+    def _get_encoding_element(self, obj, path, namespaces):
+        if path is not None:
+            return self.find(path, namespaces=namespaces)
+        elif isinstance(obj, dict) and len(obj) == 1:
+            return self.elements.get(list(obj.keys())[0])
+        elif len(self.elements) == 1:
+            return list(self.elements.values())[0]
+        else:
+            root_elements = self.root_elements
+            return root_elements[0] if len(root_elements) == 1 else None
+
     def encode(self, obj, path=None, validation='strict', *args, **kwargs):
         """
         Encodes to XML data. Takes the same arguments of the method :func:`XMLSchema.iter_encode`.
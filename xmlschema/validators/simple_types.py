@@ -12,9 +12,15 @@
 This module contains classes for XML Schema simple data types.
 """
 from __future__ import unicode_literals
+import re
 from decimal import DecimalException
 
-from ..compat import string_base_type, unicode_type
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from ..compat import string_base_type, unicode_type, long_type
 from ..etree import etree_element
 from ..exceptions import XMLSchemaTypeError, XMLSchemaValueError
 from ..qnames import (
@@ -22,14 +28,73 @@ from ..qnames import (
     XSD_ANY_ATTRIBUTE, XSD_PATTERN, XSD_MIN_INCLUSIVE, XSD_MIN_EXCLUSIVE, XSD_MAX_INCLUSIVE,
     XSD_MAX_EXCLUSIVE, XSD_LENGTH, XSD_MIN_LENGTH, XSD_MAX_LENGTH, XSD_WHITE_SPACE, XSD_LIST,
     XSD_ANY_SIMPLE_TYPE, XSD_UNION, XSD_RESTRICTION, XSD_ANNOTATION, XSD_ASSERTION, XSD_ID,
-    XSD_FRACTION_DIGITS, XSD_TOTAL_DIGITS, XSD_EXPLICIT_TIMEZONE, XSD_ERROR, XSD_ASSERT
+    XSD_FRACTION_DIGITS, XSD_TOTAL_DIGITS, XSD_EXPLICIT_TIMEZONE, XSD_ERROR, XSD_ASSERT,
+    XSD_ENUMERATION, XSD_BOOLEAN, XSD_DECIMAL, XSD_FLOAT, XSD_DOUBLE, XSD_DURATION,
+    XSD_DATETIME, XSD_DATE, XSD_TIME, XSD_GYEAR, XSD_GYEAR_MONTH, XSD_GMONTH, XSD_GMONTH_DAY, XSD_GDAY
 )
 from ..helpers import get_qname, local_name, get_xsd_derivation_attribute
 
 from .exceptions import XMLSchemaValidationError, XMLSchemaEncodeError, XMLSchemaDecodeError, XMLSchemaParseError
-from .xsdbase import XsdAnnotation, XsdType, ValidationMixin
-from .facets import XsdFacet, XsdWhiteSpaceFacet, XSD_10_FACETS_BUILDERS, XSD_11_FACETS_BUILDERS, XSD_10_FACETS, \
+from .xsdbase import XsdAnnotation, XsdType, ValidationMixin, DecodeContext
+from .facets import (
+    XsdFacet, XsdWhiteSpaceFacet, XsdMinInclusiveFacet, XsdMinExclusiveFacet, XsdMaxInclusiveFacet,
+    XsdMaxExclusiveFacet, XsdAssertionFacet, XSD_10_FACETS_BUILDERS, XSD_11_FACETS_BUILDERS, XSD_10_FACETS,
     XSD_11_FACETS, XSD_10_LIST_FACETS, XSD_11_LIST_FACETS, XSD_10_UNION_FACETS, XSD_11_UNION_FACETS, MULTIPLE_FACETS
+)
+
+
+# Lexical checks of primitive types, used by unions for skipping member types that
+# surely cannot decode a text. They are looser than the decoders: a match doesn't
+# imply that the text is a valid value for the primitive type.
+LEXICAL_FILTERS = {
+    XSD_DECIMAL: re.compile(r'^(?=.*\d)[+-]?[\w.]*(?:[eE][+-]?\w*)?$', re.UNICODE).match,
+    XSD_FLOAT: re.compile(r'^[+-]?[\w.]*(?:[eE][+-]?\w*)?$', re.UNICODE).match,
+    XSD_DOUBLE: re.compile(r'^[+-]?[\w.]*(?:[eE][+-]?\w*)?$', re.UNICODE).match,
+    XSD_BOOLEAN: re.compile(r'^(?:true|false|1|0)$').match,
+    XSD_DURATION: re.compile(r'^-?P').match,
+    XSD_DATETIME: re.compile(r'^-?[0-9]{4,}-[0-9]{2}-[0-9]{2}').match,
+    XSD_DATE: re.compile(r'^-?[0-9]{4,}-[0-9]{2}-[0-9]{2}').match,
+    XSD_TIME: re.compile(r'^[0-9]{2}:[0-9]{2}').match,
+    XSD_GYEAR: re.compile(r'^-?[0-9]{4,}').match,
+    XSD_GYEAR_MONTH: re.compile(r'^-?[0-9]{4,}-[0-9]{2}').match,
+    XSD_GMONTH: re.compile(r'^--[0-9]{2}').match,
+    XSD_GMONTH_DAY: re.compile(r'^--[0-9]{2}-[0-9]{2}').match,
+    XSD_GDAY: re.compile(r'^---[0-9]{2}').match,
+}
+
+NUMERIC_PRIMITIVE_TYPES = frozenset((XSD_DECIMAL, XSD_FLOAT, XSD_DOUBLE))
+WHITESPACE_SUB = re.compile(r'\s', re.UNICODE).sub
+WHITESPACES_SUB = re.compile(r'\s+', re.UNICODE).sub
+
+
+def replace_white_spaces(text):
+    """Applies the 'replace' white space normalization, returning the argument if unchanged."""
+    try:
+        if text.isprintable():
+            return text  # all the whitespaces except ' ' are not printable
+    except AttributeError:
+        pass  # Python 2.7 unicode strings have no isprintable()
+    return WHITESPACE_SUB(' ', text)
+
+
+def collapse_white_spaces(text):
+    """Applies the 'collapse' white space normalization, returning the argument if unchanged."""
+    try:
+        if text.isprintable() and '  ' not in text and text[:1] != ' ' and text[-1:] != ' ':
+            return text
+    except AttributeError:
+        pass
+    return WHITESPACES_SUB(' ', text).strip()
+
+
+WHITE_SPACE_NORMALIZERS = {
+    'replace': replace_white_spaces,
+    'collapse': collapse_white_spaces,
+}
+
+INTEGER_LEXICAL_MATCH = re.compile(r'^[+-]?[0-9]+$').match
+DECIMAL_LEXICAL_MATCH = re.compile(r'^[+-]?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)$').match
+RANGE_FACETS = (XsdMinInclusiveFacet, XsdMinExclusiveFacet, XsdMaxInclusiveFacet, XsdMaxExclusiveFacet)
 
 
 def xsd_simple_type_factory(elem, schema, parent):
@@ -106,6 +171,9 @@ class XsdSimpleType(XsdType, ValidationMixin):
     white_space = None
     patterns = None
     validators = ()
+    _values_cache = None
+    _decimal_plan = None
+    _normalize_white_space = None
 
     def __init__(self, elem, schema, parent, name=None, facets=None):
         super(XsdSimpleType, self).__init__(elem, schema, parent, name)
@@ -114,7 +182,11 @@ class XsdSimpleType(XsdType, ValidationMixin):
 
     def __setattr__(self, name, value):
         super(XsdSimpleType, self).__setattr__(name, value)
-        if name == 'facets':
+        if name == 'white_space':
+            self._normalize_white_space = WHITE_SPACE_NORMALIZERS.get(value)
+        elif name == 'facets':
+            self._values_cache = None
+            self._decimal_plan = None
             if not isinstance(self, XsdAtomicBuiltin):
                 self._parse_facets(value)
 
@@ -341,16 +413,78 @@ class XsdSimpleType(XsdType, ValidationMixin):
         elif not isinstance(text, string_base_type):
             raise XMLSchemaValueError('argument is not a string: %r' % text)
 
-        if self.white_space == 'replace':
-            return self._REGEX_SPACE.sub(' ', text)
-        elif self.white_space == 'collapse':
-            return self._REGEX_SPACES.sub(' ', text).strip()
-        else:
+        if self._normalize_white_space is None:
             return text
+        return self._normalize_white_space(text)
 
     def text_decode(self, text):
         return self.decode(text, validation='skip')
 
+    def get_values_cache(self):
+        """
+        Returns the cache of the decoded values of the type, a dictionary that maps
+        valid lexical values to decoded values. The cache is enabled only for atomic
+        types that have a small or enumerated value space and that are not derived
+        from xs:ID. Returns `None` if the cache is not enabled for the type. The max
+        size of the cache is set by the *values_cache_size* attribute of the schema
+        that validates, read at each decoding, so builtin types shared by many schemas
+        follow the setting of the schema that is used.
+        """
+        if self._values_cache is None:
+            self._values_cache = False
+            primitive_type = getattr(self, 'primitive_type', None)
+            if isinstance(primitive_type, XsdAtomicBuiltin) and not self.is_key():
+                if primitive_type.name == XSD_BOOLEAN or self.get_facet(XSD_ENUMERATION) is not None:
+                    self._values_cache = {}
+        return self._values_cache if self._values_cache is not False else None
+
+    def _get_values_cache(self, kwargs):
+        # The size is provided by the validating schema, defaults to the one of the owner schema
+        try:
+            cache_size = kwargs['values_cache_size']
+        except KeyError:
+            cache_size = getattr(self.schema, 'values_cache_size', 0)
+
+        if cache_size > 0:
+            values_cache = self._values_cache
+            if values_cache is None:
+                values_cache = self.get_values_cache()
+            if isinstance(values_cache, dict):
+                return values_cache, cache_size
+        return None, 0
+
+    def decode_batch(self, chunks):
+        """
+        Decodes a sequence of lexical values in a single step, as required for the
+        items of a list. Returns the list of decoded values or `None` if the type
+        has no batch decoding or if any value is invalid. In the latter case the
+        values have to be decoded one by one for getting the errors.
+
+        :param chunks: a list of non-empty strings without whitespaces.
+        """
+        return
+
+    def _validate_batch(self, values):
+        extremes = None
+        for validator in self.validators:
+            if isinstance(validator, RANGE_FACETS) or not isinstance(validator, XsdFacet):
+                # For numeric types the builtin validators are range checks too
+                if extremes is None:
+                    try:
+                        if any(v != v for v in values):
+                            return False  # NaN values are not ordered
+                        extremes = (min(values), max(values))
+                    except (TypeError, ArithmeticError):
+                        return False
+                checked_values = extremes
+            else:
+                checked_values = values
+
+            for value in checked_values:
+                for _ in validator(value):
+                    return False
+        return True
+
     def iter_decode(self, obj, validation='lax', **kwargs):
         if isinstance(obj, (string_base_type, bytes)):
             obj = self.normalize(obj)
@@ -458,6 +592,66 @@ class XsdAtomic(XsdSimpleType):
     def is_list():
         return False
 
+    def _build_decimal_plan(self):
+        # Collects the patterns and the validators of the derivation chain of a type
+        # that decodes to Decimal values, if they can be applied to int values too.
+        patterns = []
+        validators = []
+        xsd_type = self
+        while isinstance(xsd_type, XsdAtomicRestriction):
+            if any(isinstance(v, XsdAssertionFacet) for v in xsd_type.validators):
+                return
+            elif xsd_type.patterns is not None:
+                patterns.append(xsd_type.patterns)
+            validators.extend(xsd_type.validators)
+            xsd_type = xsd_type.base_type
+
+        if not isinstance(xsd_type, XsdAtomicBuiltin) or xsd_type.name != XSD_DECIMAL:
+            return
+        elif xsd_type.patterns is not None:
+            patterns.append(xsd_type.patterns)
+        validators.extend(xsd_type.validators)
+
+        # Facets are bypassed by values parsed as float only if there are no facets
+        float_parsing = not any(isinstance(v, XsdFacet) for v in validators)
+        return patterns, validators, float_parsing
+
+    def _fast_decimal_decode(self, text, decimal_type):
+        """
+        Decodes a normalized text to the *decimal_type* (`float` or `int`) without
+        building a `Decimal` value. Integer texts are checked with int values, that
+        compare exactly with the Decimal values of the facets. Returns `None` if the
+        text cannot be decoded this way or if it's not valid.
+        """
+        if decimal_type is not float and decimal_type is not int:
+            return
+
+        plan = self._decimal_plan
+        if plan is None:
+            plan = self._decimal_plan = self._build_decimal_plan() or False
+        if not plan:
+            return
+
+        patterns, validators, float_parsing = plan
+        if INTEGER_LEXICAL_MATCH(text) is not None:
+            value = int(text)
+        elif float_parsing and decimal_type is float and DECIMAL_LEXICAL_MATCH(text) is not None:
+            value = float(text)
+        else:
+            return
+
+        for pattern in patterns:
+            if pattern._fullmatch(text) is None:
+                return
+        for validator in validators:
+            for _ in validator(value):
+                return
+
+        try:
+            return decimal_type(value)
+        except OverflowError:
+            return
+
 
 class XsdAtomicBuiltin(XsdAtomic):
     """
@@ -508,12 +702,46 @@ class XsdAtomicBuiltin(XsdAtomic):
     def admitted_facets(self):
         return self._admitted_facets or self.primitive_type.admitted_facets
 
+    def decode_batch(self, chunks):
+        if self.name == XSD_ID or self.primitive_type.name not in NUMERIC_PRIMITIVE_TYPES:
+            return
+
+        if self.patterns is not None:
+            fullmatch = self.patterns._fullmatch
+            if any(fullmatch(chunk) is None for chunk in chunks):
+                return
+
+        try:
+            values = [self.to_python(chunk) for chunk in chunks]
+        except (ValueError, DecimalException):
+            return
+
+        if self._validate_batch(values):
+            return values
+
     def iter_decode(self, obj, validation='lax', **kwargs):
+        errors = []
+        result = self._raw_decode(obj, DecodeContext(validation, None, kwargs), errors)
+        for error in errors:
+            yield error
+        yield result
+
+    def _raw_decode(self, obj, context, errors):
+        validation = context.validation
+        kwargs = context.kwargs
+        text = None
         if isinstance(obj, (string_base_type, bytes)):
+            values_cache, cache_size = self._get_values_cache(kwargs)
+            if values_cache is not None:
+                try:
+                    return values_cache[obj]
+                except KeyError:
+                    pass
+                text = obj
             obj = self.normalize(obj)
         elif validation != 'skip' and obj is not None and not isinstance(obj, self.instance_types):
-            yield self.decode_error(validation, obj, self.to_python,
-                                    reason="value is not an instance of {!r}".format(self.instance_types))
+            errors.append(self.decode_error(validation, obj, self.to_python,
+                                            reason="value is not an instance of {!r}".format(self.instance_types)))
 
         if self.name == XSD_ID:
             try:
@@ -521,33 +749,42 @@ class XsdAtomicBuiltin(XsdAtomic):
             except KeyError:
                 pass
             else:
-                id_map[obj] += 1
-                if id_map[obj] > 1:
-                    yield self.validation_error(validation, "Duplicated xsd:ID value {!r}".format(obj))
+                count = id_map[obj] + 1
+                id_map[obj] = count
+                if count > 1:
+                    errors.append(self.validation_error(validation, "Duplicated xsd:ID value {!r}".format(obj)))
+
+        if 'decimal_type' in kwargs and self._decimal_plan is not False and isinstance(obj, string_base_type):
+            value = self._fast_decimal_decode(obj, kwargs['decimal_type'])
+            if value is not None:
+                return value
 
         if validation == 'skip':
             try:
-                yield self.to_python(obj)
+                return self.to_python(obj)
             except (ValueError, DecimalException):
-                yield unicode_type(obj)
-            return
+                return unicode_type(obj)
 
+        valid = True
         if self.patterns is not None:
             for error in self.patterns(obj):
-                yield error
+                valid = False
+                errors.append(error)
 
         try:
             result = self.to_python(obj)
         except (ValueError, DecimalException) as err:
-            yield self.decode_error(validation, obj, self.to_python, reason=str(err))
-            yield None
+            errors.append(self.decode_error(validation, obj, self.to_python, reason=str(err)))
             return
 
         for validator in self.validators:
             for error in validator(result):
-                yield error
+                valid = False
+                errors.append(error)
 
-        yield result
+        if valid and text is not None and len(values_cache) < cache_size:
+            values_cache[text] = result
+        return result
 
     def iter_encode(self, obj, validation='lax', **kwargs):
         if isinstance(obj, (string_base_type, bytes)):
@@ -729,20 +966,50 @@ class XsdList(XsdSimpleType):
             for error in self.patterns(obj):
                 yield error
 
-        items = []
-        for chunk in obj.split():
-            for result in self.base_type.iter_decode(chunk, validation, **kwargs):
-                if isinstance(result, XMLSchemaValidationError):
-                    yield result
-                else:
-                    items.append(result)
+        decimal_type = kwargs.pop('decimal_type', None)  # the conversion doesn't apply to list items
+        chunks = obj.split()
+        items = self.base_type.decode_batch(chunks) if chunks else []
+        if items is None:
+            errors = []
+            context = DecodeContext(validation, None, kwargs)
+            raw_decode = self.base_type._raw_decode
+            items = [raw_decode(chunk, context, errors) for chunk in chunks]
+            for error in errors:
+                yield error
 
         if validation != 'skip':
             for validator in self.validators:
                 for error in validator(items):
                     yield error
 
-        yield items
+        yield self.to_array(items, decimal_type) if kwargs.get('list_array') else items
+
+    def to_array(self, items, decimal_type=None):
+        """
+        Converts a list of decoded items to a NumPy array, using floats for
+        decimal values. Returns the list unchanged if NumPy is not installed,
+        if the item type is not numeric or if the items are not convertible.
+
+        :param items: a list of values decoded by the item type.
+        :param decimal_type: the conversion type requested for decimal values. \
+        If provided and it's not `float` lists of decimals are not converted.
+        """
+        if numpy is None:
+            return items
+
+        primitive_type = getattr(self.base_type, 'primitive_type', None)
+        if not isinstance(primitive_type, XsdAtomicBuiltin) or \
+                primitive_type.name not in NUMERIC_PRIMITIVE_TYPES:
+            return items
+
+        try:
+            if items and isinstance(items[0], (int, long_type)):
+                return numpy.array(items, dtype=numpy.int64)
+            elif primitive_type.name == XSD_DECIMAL and decimal_type not in (None, float):
+                return items
+            return numpy.array(items, dtype=float)
+        except (ValueError, TypeError, OverflowError):
+            return items
 
     def iter_encode(self, obj, validation='lax', **kwargs):
         if not hasattr(obj, '__iter__') or isinstance(obj, (str, unicode_type, bytes)):
@@ -780,6 +1047,7 @@ class XsdUnion(XsdSimpleType):
     _ADMITTED_TAGS = {XSD_UNION}
 
     member_types = None
+    _member_filters = None
 
     def __init__(self, elem, schema, parent, name=None):
         super(XsdUnion, self).__init__(elem, schema, parent, name, facets=None)
@@ -803,6 +1071,8 @@ class XsdUnion(XsdSimpleType):
             if not (value is None or value == 'collapse'):
                 raise XMLSchemaValueError("Wrong value % for attribute 'white_space'." % value)
             value = 'collapse'
+        elif name == 'member_types':
+            self._member_filters = None
         super(XsdUnion, self).__setattr__(name, value)
 
     def _parse(self):
@@ -870,6 +1140,29 @@ class XsdUnion(XsdSimpleType):
             for obj in mt.iter_components(xsd_classes):
                 yield obj
 
+    def get_candidate_types(self, text):
+        """
+        Returns the member types that could decode the text, preserving the
+        declaration order. Member types derived from a primitive type whose
+        lexical space surely excludes the text are skipped.
+
+        :param text: the text to decode.
+        """
+        if self._member_filters is None:
+            member_filters = []
+            for member_type in self.member_types:
+                primitive_type = getattr(member_type, 'primitive_type', None)
+                if isinstance(primitive_type, XsdAtomicBuiltin):
+                    member_filters.append((member_type, LEXICAL_FILTERS.get(primitive_type.name)))
+                else:
+                    member_filters.append((member_type, None))
+            self._member_filters = member_filters
+
+        if not isinstance(text, string_base_type):
+            return self.member_types
+        text = text.strip()
+        return [mt for mt, match in self._member_filters if match is None or match(text) is not None]
+
     def iter_decode(self, obj, validation='lax', **kwargs):
         if isinstance(obj, (string_base_type, bytes)):
             obj = self.normalize(obj)
@@ -878,8 +1171,10 @@ class XsdUnion(XsdSimpleType):
             for error in self.patterns(obj):
                 yield error
 
+        kwargs.pop('decimal_type', None)  # the union's facets have to be checked on Decimal values
+
         # Try the text as a whole
-        for member_type in self.member_types:
+        for member_type in self.get_candidate_types(obj):
             for result in member_type.iter_decode(obj, validation='lax', **kwargs):
                 if not isinstance(result, XMLSchemaValidationError):
                     if validation != 'skip':
@@ -898,7 +1193,7 @@ class XsdUnion(XsdSimpleType):
         items = []
         not_decodable = []
         for chunk in obj.split():
-            for member_type in self.member_types:
+            for member_type in self.get_candidate_types(chunk):
                 for result in member_type.iter_decode(chunk, validation='lax', **kwargs):
                     if isinstance(result, XMLSchemaValidationError):
                         break
@@ -1132,12 +1427,50 @@ class XsdAtomicRestriction(XsdAtomic):
             for obj in self.base_type.iter_components(xsd_classes):
                 yield obj
 
+    def decode_batch(self, chunks):
+        if not self.base_type.is_simple():
+            return
+
+        if self.patterns is not None:
+            fullmatch = self.patterns._fullmatch
+            if any(fullmatch(chunk) is None for chunk in chunks):
+                return
+
+        values = self.base_type.decode_batch(chunks)
+        if values is not None and self._validate_batch(values):
+            return values
+
     def iter_decode(self, obj, validation='lax', **kwargs):
+        text = None
         if isinstance(obj, (string_base_type, bytes)):
+            values_cache, cache_size = self._get_values_cache(kwargs)
+            if values_cache is not None:
+                try:
+                    yield values_cache[obj]
+                except KeyError:
+                    pass
+                else:
+                    return
+                if validation != 'skip':
+                    text = obj
             obj = self.normalize(obj)
 
+        decimal_type = kwargs.get('decimal_type')
+        if 'decimal_type' in kwargs:
+            if self._decimal_plan is not False and isinstance(obj, string_base_type):
+                value = self._fast_decimal_decode(obj, decimal_type)
+                if value is not None:
+                    yield value
+                    return
+            del kwargs['decimal_type']  # base types have to decode to Decimal for checking the facets
+
+        list_array = kwargs.get('list_array') and isinstance(self.primitive_type, XsdList)
+        if list_array:
+            kwargs['list_array'] = False  # the conversion is done after the facets validation
+
         if validation != 'skip' and self.patterns:
             for error in self.patterns(obj):
+                text = None
                 yield error
 
         if self.base_type.is_simple():
@@ -1153,6 +1486,7 @@ class XsdAtomicRestriction(XsdAtomic):
 
         for result in base_type.iter_decode(obj, validation, **kwargs):
             if isinstance(result, XMLSchemaValidationError):
+                text = None
                 yield result
                 if isinstance(result, XMLSchemaDecodeError):
                     yield unicode_type(obj) if validation == 'skip' else None
@@ -1160,9 +1494,12 @@ class XsdAtomicRestriction(XsdAtomic):
                 if validation != 'skip':
                     for validator in self.validators:
                         for error in validator(result):
+                            text = None
                             yield error
 
-                yield result
+                if text is not None and len(values_cache) < cache_size:
+                    values_cache[text] = result
+                yield self.primitive_type.to_array(result, decimal_type) if list_array else result
                 return
 
     def iter_encode(self, obj, validation='lax', **kwargs):
@@ -641,6 +641,40 @@ class XsdType(XsdComponent):
         raise NotImplementedError
 
 
+class DecodeContext(object):
+    """
+    The state of a decoding run. It's created once by the main decoder and shared
+    by reference between the decoders of the elements, of the model groups and of
+    the attribute groups, with the options used for each element resolved in advance.
+
+    :param validation: the validation mode, can be 'lax', 'strict' or 'skip.
+    :param converter: the :class:`XMLSchemaConverter` instance used for the decoding.
+    :param kwargs: keyword arguments of the decoding process, passed unchanged \
+    to the decoders of the attributes, of the simple contents and of the wildcards.
+    """
+    __slots__ = ('validation', 'converter', 'kwargs', 'source', 'namespaces', 'use_defaults',
+                 'filler', 'fill_missing', 'decimal_type', 'datetime_types', 'no_depth', 'max_errors')
+
+    def __init__(self, validation, converter, kwargs):
+        self.validation = validation
+        self.converter = converter
+        self.kwargs = kwargs
+        self.source = kwargs.get('source')
+        self.namespaces = kwargs.get('namespaces')
+        self.use_defaults = kwargs.get('use_defaults', False)
+        self.filler = kwargs.get('filler')
+        self.fill_missing = kwargs.get('fill_missing', False)
+        self.decimal_type = kwargs.get('decimal_type')
+        self.datetime_types = kwargs.get('datetime_types', False)
+        self.no_depth = kwargs.get('no_depth', False)
+        self.max_errors = kwargs.get('max_errors')
+
+    def __repr__(self):
+        return '%s(validation=%r, converter=%r)' % (
+            self.__class__.__name__, self.validation, self.converter
+        )
+
+
 class ValidationMixin(object):
     """
     Mixin for implementing XML data validators/decoders. A derived class must implement the
@@ -761,6 +795,32 @@ class ValidationMixin(object):
         """
         raise NotImplementedError
 
+    def raw_decode(self, obj, validation, errors, **kwargs):
+        """
+        Decodes without the generator protocol of :meth:`iter_decode`: the validation
+        errors are appended to a list and the decoded object is returned. Components
+        that are leaves of the decoding process override this with a direct
+        implementation, so the callers don't need to iterate a generator.
+
+        :param obj: the data that has to be decoded.
+        :param validation: the validation mode. Can be 'lax', 'strict' or 'skip'.
+        :param errors: the list where the validation errors are appended.
+        :param kwargs: keyword arguments for the decoder API.
+        :return: the decoded object, `None` if no object is decoded.
+        """
+        return self._raw_decode(obj, DecodeContext(validation, None, kwargs), errors)
+
+    def _raw_decode(self, obj, context, errors):
+        """
+        Like :meth:`raw_decode` but with the options provided by the :class:`DecodeContext`
+        of a decoding run, so the callers don't have to repack the keyword arguments.
+        """
+        for result in self.iter_decode(obj, context.validation, **context.kwargs):
+            if isinstance(result, XMLSchemaValidationError):
+                errors.append(result)
+            else:
+                return result
+
     def iter_encode(self, obj, validation='lax', **kwargs):
         """
         Creates an iterator for Encode data to an Element.